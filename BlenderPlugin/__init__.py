@@ -1,6 +1,7 @@
 from pathlib import Path
 
 import bpy
+from bpy.app.handlers import persistent
 
 bl_info = {
     "name": "glTF Extension for i/o with Godot",
@@ -19,7 +20,7 @@ bl_info = {
 glTF_extension_name = "GONZ_blender_godot_extension"
 
 
-def project_root():
+def find_project_root():
     addon_prefs = bpy.context.preferences.addons[__package__].preferences
 
     if addon_prefs.project_dir:
@@ -34,10 +35,30 @@ def project_root():
         curr_hops += 1
 
     if (path / "project.godot").exists():
-        addon_prefs.project_dir = path
+        addon_prefs.project_dir = str(path)
 
     return path
 
+# Resolved project root per bpy.data.filepath, so UI redraws and export hooks don't walk the file system
+project_root_cache = {}
+
+
+def invalidate_project_root(*args):
+    project_root_cache.clear()
+
+
+@persistent
+def project_root_file_handler(*args):
+    invalidate_project_root()
+
+
+def project_root():
+    key = bpy.data.filepath
+    if key not in project_root_cache:
+        path = find_project_root()
+        project_root_cache[key] = path
+    return project_root_cache[key]
+
 EXPORT_TYPES = [
             ('NONE', 'None', '', 'NONE', 0),
             #('ANIMATION', 'Animation', '', 'RENDER_ANIMATION', 1),
@@ -92,18 +113,21 @@ class GBGE_preferences(bpy.types.AddonPreferences):
         default="",
         subtype="DIR_PATH",
         description="Path to the project directory. (Default is Godot Project, if one is found)",
+        update=lambda self, context: invalidate_project_root(),
     )
 
     source_dir_rel: bpy.props.StringProperty(
         name="Source Subpath",
         default="blender project",
         description="Source directory subpath, relative to Project directory",
+        update=lambda self, context: invalidate_project_root(),
     )
 
     target_dir_rel: bpy.props.StringProperty(
         name="Target Subpath",
         default="exported game",
         description="Target directory subpath, relative to Godots Project directory",
+        update=lambda self, context: invalidate_project_root(),
     )
 
     def draw(self, context):
@@ -165,6 +189,8 @@ def register():
         bpy.utils.register_class(c)
     bpy.types.Collection.GBGE_asset_properties = bpy.props.PointerProperty(type=GBGE_asset_properties)
     bpy.types.Scene.GBGE_Godot_properties = bpy.props.PointerProperty(type=GBGE_Godot_properties)
+    bpy.app.handlers.load_post.append(project_root_file_handler)
+    bpy.app.handlers.save_post.append(project_root_file_handler)
     bpy.types.COLLECTION_PT_exporters.prepend(draw_export_collection) #This line makes it so the extra buttons get drawn on the collection export setup I havent found any documentation on COLLECTION_PT_exporters
 
 
@@ -173,6 +199,8 @@ def unregister():
         bpy.utils.unregister_class(c)
     del bpy.types.Collection.GBGE_asset_properties 
     del bpy.types.Scene.GBGE_Godot_properties 
+    bpy.app.handlers.load_post.remove(project_root_file_handler)
+    bpy.app.handlers.save_post.remove(project_root_file_handler)
     bpy.types.COLLECTION_PT_exporters.remove(draw_export_collection)
 
 
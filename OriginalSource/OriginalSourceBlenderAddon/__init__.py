@@ -1,11 +1,17 @@
 import bpy
+from bpy.app.handlers import persistent
 import os
 import json
 from pathlib import Path
-import fnmatch
 import subprocess
-from pprint import pprint
-import shutil
+import time
+import hashlib
+import queue
+import threading
+import functools
+from contextlib import contextmanager, nullcontext
+
+from .gltfio_core import asset_index, blend_file, file_walk, gltf_scan, post_process, profiling, project, textures
 
 bl_info = {
     "name": "glTF Extension for i/o with Godot",
@@ -31,7 +37,7 @@ glTF_extension_name = "EXT_example_extension"
 # would be "required", but physics metadata or app-specific settings could be optional.
 extension_is_required = False
 
-EXCLUDE_LAYER_COLLECTIONS = set()
+EXCLUDE_LAYER_COLLECTIONS = []
 
 def split_id_name(name):
     if not '.'in name:
@@ -43,44 +49,160 @@ def split_id_name(name):
     name_string = '.'.join(name_el[:-1])
     return (name_string, extension)
 
-def data_snapshot():
-
-    data = set()
-    for attr in dir(bpy.data):
-        if not type(getattr(bpy.data, attr)) == type(bpy.data.scenes):
-            continue
-        data |= set(getattr(bpy.data, attr))
+# ID.id_type -> bpy.data collection
+ID_TYPE_COLLECTIONS = {
+    'ACTION': 'actions',
+    'COLLECTION': 'collections',
+    'CURVE': 'curves',
+    'CURVES': 'hair_curves',
+    'IMAGE': 'images',
+    'MATERIAL': 'materials',
+    'MESH': 'meshes',
+    'NODETREE': 'node_groups',
+    'OBJECT': 'objects',
+    'TEXTURE': 'textures',
+}
 
-    return data
+class TempDataRegistry:
+    """ Everything the export pipeline creates temporarily, so it can be removed
+    again without scanning all of bpy.data.
+    """
 
-def remove_ids(ids):
-    for id in ids:
-        for attr in dir(bpy.data):
-            if not type(getattr(bpy.data, attr)) == type(bpy.data.scenes):
-                continue
-            if id in getattr(bpy.data, attr)[:]:
-                exec(f'bpy.data.{attr}.remove(id)')
+    def __init__(self):
+        self.ids = []
+        self.remaps = []
+        self.modifiers = []
+        self.data = []
+        self.instancers = []
+
+    def track(self, id_data, original=None):
+        """ Track a temporary ID. Users remapped from `original` are given back to it on cleanup.
+        """
+        self.ids.append(id_data)
+        if original is not None:
+            self.remaps.append((id_data, original))
+        return id_data
+
+    def track_modifier(self, ob, mod):
+        self.modifiers.append((ob, mod.name))
+        return mod
+
+    def track_data(self, ob):
+        """ Remember the object data of `ob`, so it can be swapped for temporary data and restored on cleanup.
+        """
+        self.data.append((ob, ob.data))
+
+    def track_instancer(self, ob):
+        """ Remember a collection instance whose instancing was disabled for the export.
+        """
+        self.instancers.append(ob)
+
+    def cleanup_instancers(self):
+        for ob in self.instancers:
+            ob.instance_type = 'COLLECTION'
+        self.instancers = []
+
+    def cleanup_modifiers(self):
+        for ob, name in reversed(self.modifiers):
+            mod = ob.modifiers.get(name)
+            if mod:
+                ob.modifiers.remove(mod)
+        self.modifiers = []
+
+    def cleanup_ids(self):
+        # Restore object data first, so removing temporary data doesn't leave objects without any
+        for ob, data in reversed(self.data):
+            ob.data = data
+        self.data = []
+        for temp, original in self.remaps:
+            temp.user_remap(original)
+        self.remaps = []
+        for id_data in reversed(self.ids):
+            getattr(bpy.data, ID_TYPE_COLLECTIONS[id_data.id_type]).remove(id_data)
+        self.ids = []
+
+    def cleanup(self):
+        self.cleanup_instancers()
+        self.cleanup_modifiers()
+        self.cleanup_ids()
+
+TEMP_DATA = TempDataRegistry()
+
+GLTF_EXPORT_FORMATS = project.GLTF_EXPORT_FORMATS
+GLTF_FILE_PATTERNS = project.GLTF_FILE_PATTERNS
 
 def get_asset_index(self):
     collection = self.id_data
     if 'asset_id' not in collection.keys():
         return ''
     return collection['asset_id']
+
+# bpy.data.filepath -> ProjectConfig, None outside of a project
+PROJECT_PATHS_CACHE = dict()
+
+def invalidate_project_paths(*args):
+    PROJECT_PATHS_CACHE.clear()
+
+def update_project_paths(self, context):
+    invalidate_project_paths()
+
+@persistent
+def project_paths_file_handler(*args):
+    invalidate_project_paths()
+
 class GLTFIO_preferences(bpy.types.AddonPreferences):
     bl_idname = __package__
 
     project_dir: bpy.props.StringProperty(  name='Project Path',
                                             default='',
                                             subtype='DIR_PATH',
-                                            description='Path to the project directory. (Default is Blender Project, if one is found)'
+                                            description='Path to the project directory. (Default is Blender Project, if one is found)',
+                                            update=update_project_paths,
                                             )
     source_dir_rel: bpy.props.StringProperty(   name='Source Subpath',
                                                 default='',
-                                                description='Source directory subpath, relative to Project directory'
+                                                description='Source directory subpath, relative to Project directory',
+                                                update=update_project_paths,
                                                 )
     target_dir_rel: bpy.props.StringProperty(   name='Target Subpath',
                                                 default='game',
-                                                description='Target directory subpath, relative to Blender Project directory'
+                                                description='Target directory subpath, relative to Blender Project directory',
+                                                update=update_project_paths,
+                                                )
+    texture_max_size: bpy.props.IntProperty(    name='Max Texture Size',
+                                                default=0,
+                                                min=0,
+                                                description='Downscale exported textures so their longest side fits this size in pixels. 0 keeps the source resolution. Textures embedded in .glb files are not resized'
+                                                )
+    texture_power_of_two: bpy.props.BoolProperty(   name='Power of Two Textures',
+                                                    default=False,
+                                                    description='Round the size of exported textures down to powers of two'
+                                                    )
+    export_format: bpy.props.EnumProperty(  name='Export Format',
+                                            items=[
+                                                ('GLTF_SEPARATE', 'glTF Separate', 'JSON .gltf with separate .bin buffers and textures'),
+                                                ('GLB', 'glTF Binary', 'Single binary .glb file with embedded buffers and textures'),
+                                            ],
+                                            default='GLTF_SEPARATE',
+                                            description='File format used when initializing the exporters of asset collections'
+                                            )
+    use_texture_store: bpy.props.BoolProperty(  name='Shared Texture Store',
+                                                default=False,
+                                                description='Store exported textures once by content in the target directory and hardlink them to their paths',
+                                                update=update_project_paths,
+                                                )
+    profile_exports: bpy.props.BoolProperty(    name='Profile Exports',
+                                                default=False,
+                                                description='Trace peak memory of each exported collection and write stage timings to export_profile.json in the target directory'
+                                                )
+    profile_python: bpy.props.BoolProperty( name='Python Profile',
+                                            default=False,
+                                            description='Run each collection export under cProfile and write the stats to .export_profiles in the target directory. Slows down exports'
+                                            )
+    excluded_dirs: bpy.props.StringProperty(    name='Excluded Folders',
+                                                default='.godot, .git',
+                                                description='Comma separated folder names or patterns to skip when searching the project. Hidden folders are always skipped',
+                                                update=update_project_paths,
                                                 )
 
     def draw(self, context):
@@ -104,10 +226,20 @@ class GLTFIO_preferences(bpy.types.AddonPreferences):
         row.enabled = False
         row.label()
         row.label(text=str(Path(project_dir).joinpath(self.target_dir_rel)))
+        layout.prop(self, 'excluded_dirs')
+        layout.prop(self, 'export_format')
+        layout.prop(self, 'use_texture_store')
+        row = layout.row()
+        row.prop(self, 'texture_max_size')
+        row.prop(self, 'texture_power_of_two')
+        row = layout.row()
+        row.prop(self, 'profile_exports')
+        row.prop(self, 'profile_python')
         
         split = layout.split()
         split.operator('gltfio.cleanup_asset_index')
         split.operator('gltfio.cleanup_material_index')
+        layout.operator('gltfio.cleanup_indexes')
 
 class GLTFIO_PT_gltfio_export_panel(bpy.types.Panel):
     bl_space_type = 'VIEW_3D'
@@ -145,6 +277,15 @@ class GLTFIO_PT_gltfio_export_panel(bpy.types.Panel):
         if batch_export_panel:
             batch_export_panel.prop(gltfio_props, 'search_root_dir', placeholder=str(project_root()))
             batch_export_panel.prop(gltfio_props, 'filename_filter')
+            batch_export_panel.prop(gltfio_props, 'skip_up_to_date')
+            if gltfio_props.skip_up_to_date:
+                batch_export_panel.prop(gltfio_props, 'include_dependents')
+            batch_export_panel.prop(gltfio_props, 'export_jobs')
+            batch_export_panel.prop(gltfio_props, 'use_export_workers')
+            if gltfio_props.use_export_workers:
+                col = batch_export_panel.column(align=True)
+                col.prop(gltfio_props, 'worker_max_files')
+                col.prop(gltfio_props, 'worker_max_memory')
             if gltfio_props.export_progress == 0.:
                 op = batch_export_panel.operator('gltfio.batch_export', icon="DUPLICATE")
             else:
@@ -215,6 +356,39 @@ class gltfIOGodotProperties(bpy.types.PropertyGroup):
         name="Filter",
         default='*-anim.blend',
     )
+    skip_up_to_date: bpy.props.BoolProperty(
+        name='Skip Up-to-Date Files',
+        default=True,
+        description='Deselect files whose export manifest entry shows unchanged sources and existing outputs'
+    )
+    include_dependents: bpy.props.BoolProperty(
+        name='Include Dependents',
+        default=True,
+        description='Also select files that link a changed .blend file, directly or indirectly'
+    )
+    export_jobs: bpy.props.IntProperty(
+        name='Jobs',
+        default=0,
+        min=0,
+        description='Number of Blender processes to run at once during batch export (0 uses the CPU count)'
+    )
+    use_export_workers: bpy.props.BoolProperty(
+        name='Persistent Workers',
+        default=False,
+        description='Keep headless Blender processes alive and export several files per process'
+    )
+    worker_max_files: bpy.props.IntProperty(
+        name='Files per Worker',
+        default=50,
+        min=0,
+        description='Restart a worker after exporting this many files (0 for no limit)'
+    )
+    worker_max_memory: bpy.props.IntProperty(
+        name='Worker Memory Limit (MB)',
+        default=4096,
+        min=0,
+        description='Restart a worker once it uses more memory than this (0 for no limit)'
+    )
     export_progress: bpy.props.IntProperty(
         name='Batch Export',
         default=0,
@@ -288,20 +462,56 @@ class gltfIOGodotAssetProperties(bpy.types.PropertyGroup):
         default=False,
         description='Use placeholder materials that reference the original material by ID (always the case for linked materials).'
     )
+    texture_max_size: bpy.props.IntProperty(
+        name='Max Texture Size',
+        default=0,
+        min=0,
+        description='Maximum size in pixels of the textures exported with this asset. 0 uses the add-on preference'
+    )
+    preserve_instancing: bpy.props.BoolProperty(
+        name='Preserve Mesh Instancing',
+        default=False,
+        description='Export objects sharing a mesh as one glTF mesh. Modifiers are baked into temporary meshes instead of being applied by the exporter'
+    )
 
-def project_root():
+def find_project_root():
     addon_prefs = bpy.context.preferences.addons[__package__].preferences
 
     if addon_prefs.project_dir:
         return addon_prefs.project_dir
 
-    path = '//'
-    
-    while not '.blender_project' in os.listdir(os.path.realpath(bpy.path.abspath(path))):
-        if os.path.realpath(bpy.path.abspath(path)) == os.path.realpath(bpy.path.abspath(path+'../')):
-            return None
-        path += '../'
-    return os.path.realpath(bpy.path.abspath(path))
+    return project.find_project_root(bpy.path.abspath('//'))
+
+def project_config():
+    """ The `ProjectConfig` of the current file from the add-on preferences, None outside of a project.
+    """
+    key = bpy.data.filepath
+    if key not in PROJECT_PATHS_CACHE:
+        root = find_project_root()
+        config = None
+        if root:
+            addon_prefs = bpy.context.preferences.addons[__package__].preferences
+            config = project.ProjectConfig(
+                root,
+                source_dir_rel=addon_prefs.source_dir_rel,
+                target_dir_rel=addon_prefs.target_dir_rel,
+                prune=project.parse_excluded_dirs(addon_prefs.excluded_dirs),
+                use_texture_store=addon_prefs.use_texture_store,
+            )
+        PROJECT_PATHS_CACHE[key] = config
+    return PROJECT_PATHS_CACHE[key]
+
+def project_root():
+    config = project_config()
+    return str(config.root) if config else None
+
+def project_source_dir():
+    config = project_config()
+    return str(config.source_dir) if config else None
+
+def project_target_dir():
+    config = project_config()
+    return str(config.target_dir) if config else None
 
 def generate_id(data_block):
     asset_id = str(os.urandom(8).hex())
@@ -310,57 +520,345 @@ def generate_id(data_block):
     return asset_id
 
 def read_asset_info_from_index(asset_id, index_type='asset_index'):
-    assets = load_asset_index(index_type)
-    if not asset_id in assets.keys():
+    if ASSET_INDEX_MANAGER:
+        assets = ASSET_INDEX_MANAGER.assets(index_type)
+    else:
+        assets = load_asset_index(index_type)
+    if not assets or asset_id not in assets.keys():
         return None
     return assets[asset_id]
 
 def generate_asset_info(collection, export_settings):
-    addon_prefs = bpy.context.preferences.addons[__package__].preferences
     props = collection.gltfIOGodotAssetProperties
-    path = Path(export_settings['gltf_filepath'])
-    path = path.relative_to(Path(project_root()).joinpath(addon_prefs.target_dir_rel))
-    asset_info = {collection["asset_id"]: {
-            "name": props.asset_name,
-            "filepath": str(path)
-            }
-        }
-    return asset_info
+    return asset_index.asset_info(project_config(), collection["asset_id"], props.asset_name, export_settings['gltf_filepath'])
+
+ASSET_INDEX_MANAGER = None
+
+@contextmanager
+def index_session():
+    """ Load each index at most once and write it once when the outermost session ends.
+
+    Raises `IndexWriteError` if an index still can't be written then.
+    """
+    global ASSET_INDEX_MANAGER
+    if ASSET_INDEX_MANAGER:
+        yield ASSET_INDEX_MANAGER
+        return
+    ASSET_INDEX_MANAGER = asset_index.AssetIndexManager(project_config())
+    try:
+        yield ASSET_INDEX_MANAGER
+    finally:
+        manager = ASSET_INDEX_MANAGER
+        ASSET_INDEX_MANAGER = None
+        manager.flush(strict=True)
+
+def report_index_errors(execute):
+    """ Report indexes that couldn't be written in the operator's `execute` as an error, instead of a traceback.
+    """
+    @functools.wraps(execute)
+    def wrapper(self, context):
+        try:
+            return execute(self, context)
+        except asset_index.IndexWriteError as err:
+            self.report({'ERROR'}, str(err))
+            return {"CANCELLED"}
+    return wrapper
 
 def load_asset_index(index_type='asset_index'):
-    addon_prefs = bpy.context.preferences.addons[__package__].preferences
-    project_dir = Path(project_root())
-    if not project_dir:
-        print("Couldn't find project root!")
+    manager = ASSET_INDEX_MANAGER or asset_index.AssetIndexManager(project_config())
+    assets = manager.assets(index_type)
+    if assets is None:
         return None
-    path = project_dir / addon_prefs.target_dir_rel / f'{index_type}.json'
-    if not path.is_file():
-        print(f"Couldn't find {index_type}.json!")
-        return dict()
-    with open(str(path)) as file:
-        data = json.load(file)
-    return data['assets']
+    return dict(assets)
 
 def write_asset_index(assets, overwrite=False, index_type='asset_index'):
+    if ASSET_INDEX_MANAGER:
+        ASSET_INDEX_MANAGER.update(assets, overwrite=overwrite, index_type=index_type)
+        return
+    manager = asset_index.AssetIndexManager(project_config())
+    manager.update(assets, overwrite=overwrite, index_type=index_type)
+    manager.flush(strict=True)
+
+class ExportSession(profiling.StageTimer):
+    """ State shared by all collections exported in one run of the export operator or export script.
+
+    Holds the index manager with the pending index writes, the layer
+    collection map, caches for node groups, images and preferences, and a
+    `CollectionProfile` with stage timings for every exported collection.
+    """
+
+    def __init__(self, index, layer_collections):
+        super().__init__()
+        self.index = index
+        self.layer_collections = layer_collections
+        self.preferences = bpy.context.preferences.addons[__package__].preferences
+        self.node_groups = dict()
+        self.images = None
+        self.image_count = -1
+        self.results = []
+        self.current = None
+        self.exporter_start = None
+        self.start_time = time.perf_counter()
+
+    def node_group(self, name, path=''):
+        if name not in self.node_groups:
+            self.node_groups[name] = find_or_import_node_group(name, path)
+        return self.node_groups[name]
+
+    def image_index(self):
+        # Exports don't rename images, a changed count means images were added or removed
+        if self.images is None or self.image_count != len(bpy.data.images):
+            self.images = ImageIndex()
+            self.image_count = len(bpy.data.images)
+        return self.images
+
+    def begin_collection(self, collection, export_settings):
+        self.current = profiling.CollectionProfile(
+            collection.name,
+            export_settings['gltf_filepath'],
+            trace_memory=self.preferences.profile_exports,
+            use_cprofile=self.preferences.profile_python,
+        )
+
+    def begin_exporter(self):
+        self.exporter_start = time.perf_counter()
+
+    def end_exporter(self):
+        if self.current and self.exporter_start is not None:
+            self.current.add_time('gltf_exporter', time.perf_counter() - self.exporter_start)
+        self.exporter_start = None
+
+    def end_collection(self, outputs):
+        if not self.current:
+            return
+        profile = self.current
+        profile.outputs = outputs
+        profile.finish()
+        if profile.profiler:
+            path = export_profile_dir() / f'{bpy.path.clean_name(profile.name)}.prof'
+            path.parent.mkdir(parents=True, exist_ok=True)
+            profile.dump_profile(path)
+            print(f"Wrote Python profile of {profile.name} to {path}")
+            print(profile.profile_stats())
+        self.results.append(profile)
+        self.current = None
+
+    def write_profile(self):
+        """ Add the measurements of this run to the export profile next to the export manifest.
+        """
+        if not bpy.data.filepath:
+            return
+        self.index.update({
+            manifest_source_key(bpy.data.filepath): {
+                'time': time.perf_counter() - self.start_time,
+                'stages': dict(self.stages),
+                'collections': [profile.to_dict() for profile in self.results],
+            }
+        }, index_type='export_profile')
+
+    def report(self):
+        if not self.results:
+            return
+        total = time.perf_counter() - self.start_time
+        rows = []
+        for profile in self.results:
+            pre = sum(t for stage, t in profile.stages.items() if stage.startswith('pre_'))
+            post = sum(t for stage, t in profile.stages.items() if stage.startswith('post_'))
+            rows.append([
+                profile.name,
+                profiling.format_seconds(profile.time),
+                profiling.format_seconds(pre),
+                profiling.format_seconds(profile.stages.get('gltf_exporter')),
+                profiling.format_seconds(post),
+                profiling.format_bytes(profile.peak_memory),
+                profile.counts.get('objects', ''),
+                profile.counts.get('images', ''),
+            ])
+        print(profiling.format_table(['Collection', 'Total', 'Pre', 'glTF', 'Post', 'Peak Mem', 'Objects', 'Images'], rows))
+
+        stages = dict(self.stages)
+        for profile in self.results:
+            for stage, t in profile.stages.items():
+                stages[stage] = stages.get(stage, 0.) + t
+        rows = [[stage, profiling.format_seconds(t)] for stage, t in sorted(stages.items(), key=lambda s: s[1], reverse=True)]
+        print(profiling.format_table(['Stage', 'Time'], rows))
+        print(f"Exported {len(self.results)} collections in {total:.2f}s")
+
+EXPORT_SESSION = None
+
+@contextmanager
+def export_session(view_layer=None):
+    """ Share one `ExportSession` between all collections exported until the outermost session ends.
+    """
+    global EXPORT_SESSION
+    if EXPORT_SESSION:
+        yield EXPORT_SESSION
+        return
+    if view_layer is None:
+        view_layer = bpy.context.view_layer
+    prefs = bpy.context.preferences.addons[__package__].preferences
+    with index_session() as manager, \
+            layer_collection_session(view_layer) as layer_map, \
+            profiling.memory_tracing(prefs.profile_exports):
+        EXPORT_SESSION = ExportSession(manager, layer_map)
+        try:
+            yield EXPORT_SESSION
+        finally:
+            session = EXPORT_SESSION
+            EXPORT_SESSION = None
+            if prefs.profile_exports:
+                session.write_profile()
+            with session.stage('index_write'):
+                manager.flush()
+            session.report()
+
+def export_stage(name):
+    """ Time a stage of exporting the current collection, when an export session is running.
+    """
+    if EXPORT_SESSION and EXPORT_SESSION.current:
+        return EXPORT_SESSION.current.stage(name)
+    return nullcontext()
+
+def count_export_data(name, count):
+    if EXPORT_SESSION and EXPORT_SESSION.current:
+        EXPORT_SESSION.current.counts[name] = count
+
+def export_profile_dir():
+    return Path(project_target_dir()) / '.export_profiles'
+
+def addon_preferences():
+    if EXPORT_SESSION:
+        return EXPORT_SESSION.preferences
+    return bpy.context.preferences.addons[__package__].preferences
+
+def addon_version():
+    return '.'.join(str(v) for v in bl_info['version'])
+
+def file_hash(path, chunk_size=2**20):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as file:
+        while chunk := file.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def export_config():
     addon_prefs = bpy.context.preferences.addons[__package__].preferences
-    print('WRITING TO ASSET INDEX JSON')
-    project_dir = Path(project_root())
-    if not project_dir:
-        return None
-    path = project_dir / addon_prefs.target_dir_rel / f'{index_type}.json'
-    if not path.is_file():
-        data = dict()
-    else:
-        data = json.load(open(str(path)))
-    if not "assets" in data.keys() or overwrite:
-        data["assets"] = dict()
-    for k, v in assets.items():
-        data["assets"][k] = v
-    with open(path, 'w') as file:
+    return {
+        'addon_version': addon_version(),
+        'source_dir_rel': addon_prefs.source_dir_rel,
+        'target_dir_rel': addon_prefs.target_dir_rel,
+        'export_format': addon_prefs.export_format,
+        'texture_max_size': addon_prefs.texture_max_size,
+        'texture_power_of_two': addon_prefs.texture_power_of_two,
+    }
+
+def manifest_source_key(filepath):
+    filepath = Path(os.path.realpath(filepath))
+    source_dir = Path(os.path.realpath(project_source_dir()))
+    try:
+        return filepath.relative_to(source_dir).as_posix()
+    except ValueError:
+        return filepath.as_posix()
+
+def manifest_source_path(key):
+    path = Path(key)
+    if path.is_absolute():
+        return path
+    return Path(project_source_dir()) / path
+
+def export_up_to_date(filepath, manifest=None):
+    """ Whether the outputs recorded for this .blend in the export manifest are still valid.
+    """
+    if manifest is None:
+        manifest = load_asset_index('export_manifest')
+    if not manifest:
+        return False
+    entry = manifest.get(manifest_source_key(filepath))
+    if not entry:
+        return False
+    if entry.get('config') != export_config():
+        return False
+    try:
+        stat = os.stat(filepath)
+    except OSError:
+        return False
+    if stat.st_size != entry.get('source_size'):
+        return False
+    if stat.st_mtime_ns != entry.get('source_mtime') and file_hash(filepath) != entry.get('source_hash'):
+        return False
+    # Linked data comes from the libraries as they were at export time
+    for key, recorded in entry.get('libraries', dict()).items():
+        try:
+            stat = os.stat(manifest_source_path(key))
+        except OSError:
+            return False
+        if [stat.st_mtime_ns, stat.st_size] != recorded:
+            return False
+    target_dir = Path(project_target_dir())
+    return all((target_dir / output).is_file() for output in entry.get('outputs', []))
+
+def library_stats():
+    libraries = dict()
+    for library in bpy.data.libraries:
+        path = os.path.realpath(bpy.path.abspath(library.filepath, library=library.parent))
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        libraries[manifest_source_key(path)] = [stat.st_mtime_ns, stat.st_size]
+    return libraries
+
+def changed_blend_files(blend_files, manifest):
+    """ .blend files that changed since the exports that depend on them were recorded.
+    """
+    recorded = dict()
+    for entry in manifest.values():
+        for key, stat in entry.get('libraries', dict()).items():
+            recorded.setdefault(key, []).append(stat)
+
+    changed = set()
+    for filepath in blend_files:
+        key = manifest_source_key(filepath)
+        if key in manifest and not export_up_to_date(filepath, manifest):
+            changed.add(filepath)
+            continue
+        if key not in recorded:
+            continue
+        try:
+            stat = os.stat(filepath)
+        except OSError:
+            continue
+        if any(s != [stat.st_mtime_ns, stat.st_size] for s in recorded[key]):
+            changed.add(filepath)
+    return changed
+
+def update_export_manifest(manager, is_dirty):
+    """ Record the outputs of a full export of the current file.
+
+    Unsaved changes are not on disk, so exports of a file that had unsaved
+    changes when the export started (`is_dirty`) are not recorded. The export
+    itself changes and restores data, so this is checked before it runs.
+    """
+    filepath = bpy.data.filepath
+    if not filepath or is_dirty:
+        return
+    target_dir = Path(os.path.realpath(project_target_dir()))
+    outputs = set()
+    for output in manager.outputs:
         try:
-            file.write(json.dumps(data, indent=4))
-        except OSError as err:
-            print("Error writing index JSON: % s" % err)
+            outputs.add(Path(os.path.realpath(output)).relative_to(target_dir).as_posix())
+        except ValueError:
+            print(f"WARNING: Export output `{output}` is outside of the target directory")
+    stat = os.stat(filepath)
+    entry = {
+        'source_mtime': stat.st_mtime_ns,
+        'source_size': stat.st_size,
+        'source_hash': file_hash(filepath),
+        'config': export_config(),
+        'outputs': sorted(outputs),
+        'libraries': library_stats(),
+    }
+    manager.update({manifest_source_key(filepath): entry}, index_type='export_manifest')
 
 def init_export(context):
     gltfio_props = context.scene.gltfIOGodotProperties
@@ -417,7 +915,7 @@ def init_animation_export(context):
             context.scene.collection.children.link(collection)
         exporter = None
         for ex in collection.exporters:
-            if ex.export_properties.export_format == 'GLTF_SEPARATE':
+            if ex.export_properties.export_format in GLTF_EXPORT_FORMATS:
                 exporter = ex
         if not exporter:
             with context.temp_override(collection=collection):
@@ -474,7 +972,7 @@ def init_asset_export(context):
          
         exporter = None
         for ex in collection.exporters:
-            if ex.export_properties.export_format == 'GLTF_SEPARATE':
+            if ex.export_properties.export_format in GLTF_EXPORT_FORMATS:
                 exporter = ex
         if not exporter:
             with context.temp_override(collection=collection):
@@ -499,7 +997,7 @@ def init_character_export(context):
          
         exporter = None
         for ex in collection.exporters:
-            if ex.export_properties.export_format == 'GLTF_SEPARATE':
+            if ex.export_properties.export_format in GLTF_EXPORT_FORMATS:
                 exporter = ex
         if not exporter:
             with context.temp_override(collection=collection):
@@ -516,7 +1014,6 @@ def init_character_export(context):
     return
 
 def init_export_collection(collection, exporter=None, include_file_name=True):
-    addon_prefs = bpy.context.preferences.addons[__package__].preferences
     if not collection:
         return
     if not collection.exporters:
@@ -527,29 +1024,28 @@ def init_export_collection(collection, exporter=None, include_file_name=True):
     collection_props = collection.gltfIOGodotAssetProperties
     export_settings = exporter.export_properties
 
-    project_dir = project_root()
-    if not project_dir:
+    config = project_config()
+    if not config:
         print('ERROR: No project root directory could be identified!')
         return
-    else:
-        project_dir = Path(project_dir)
 
-    export_settings.export_format = 'GLTF_SEPARATE'
+    addon_prefs = bpy.context.preferences.addons[__package__].preferences
+    export_settings.export_format = addon_prefs.export_format
     export_settings.export_extras = True
     export_settings.at_collection_center = False #TODO get proper method for collection center
-    filepath = Path(bpy.data.filepath)
-
-    rel_path = filepath.parent.relative_to(project_dir.joinpath(addon_prefs.source_dir_rel))
-    target_root_dir = project_dir.joinpath(addon_prefs.target_dir_rel)
-    output_path = target_root_dir.joinpath(rel_path)
 
-    if include_file_name:
-        output_path = output_path.joinpath(filepath.stem)
+    parent_name = None
     if collection_props.append_parent_collection:
         parent_cols = find_parent_collections(collection)
         if len(parent_cols) == 1:
-            output_path = output_path.joinpath(parent_cols[0].name)
-    output_path = output_path.joinpath(collection_props.asset_name+'.gltf')
+            parent_name = parent_cols[0].name
+    output_path = config.output_path(
+        bpy.data.filepath,
+        collection_props.asset_name,
+        addon_prefs.export_format,
+        parent_name=parent_name,
+        include_file_name=include_file_name,
+    )
 
     if collection_props.export_type == 'NONE':
         return
@@ -645,7 +1141,7 @@ def export_collection(context, collection):
         l_cols = find_layer_collections_by_collection(collection, bpy.context.view_layer.layer_collection)
         if not l_cols:
             return
-        exclude = l_cols[0].exclude
+        exclude = l_cols[0].exclude and EXCLUDE_BATCH is None
         if exclude:
             l_cols[0].exclude = False
             bpy.context.view_layer.update()
@@ -681,17 +1177,26 @@ class GLTFIO_OT_export(bpy.types.Operator):
 
         return bpy.ops.wm.collection_export_all.poll()
 
+    @report_index_errors
     def execute(self, context):
 
-        if self.export_context=='ALL':
-            recursive_export_all_collection(context, context.scene.collection)
-        elif self.export_context=='SINGLE':
-            export_collection(context, context.collection)
-        elif self.export_context=='CHILDREN':
-            recursive_export_all_collection(context, context.collection)
+        is_dirty = bpy.data.is_dirty
+        with export_session(context.view_layer) as session:
+            if self.export_context=='ALL':
+                with batched_layer_collections(iter_export_collections(context.scene.collection)):
+                    recursive_export_all_collection(context, context.scene.collection)
+                update_export_manifest(session.index, is_dirty)
+            elif self.export_context=='SINGLE':
+                export_collection(context, context.collection)
+            elif self.export_context=='CHILDREN':
+                recursive_export_all_collection(context, context.collection)
 
         return {"FINISHED"}
 
+def cleanup_index(project_scan, index_type='asset_index'):
+    with index_session() as manager:
+        return asset_index.cleanup_index(manager, project_scan, index_type) is not None
+
 class GLTFIO_OT_cleanup_asset_index(bpy.types.Operator):
     """ 
     """
@@ -704,54 +1209,12 @@ class GLTFIO_OT_cleanup_asset_index(bpy.types.Operator):
     def poll(cls, context):
         return bool(project_root())
 
+    @report_index_errors
     def execute(self, context):
 
-        asset_index = load_asset_index()
-        if not asset_index:
+        if not cleanup_index(scan_project(), 'asset_index'):
             return {"CANCELLED"}
-
-        gltf_list = list_project_files_recursive(project_root(), '*.gltf')
-        found_assets = dict()
-
-        for path in gltf_list:
-            try:
-                with open(str(path)) as file:
-                    data = json.load(file)
-            except:
-                print(f'WARNING: Could not read `{path}`')
-                continue
-            scene_info = data['scenes'][0]
-            if 'extras' not in scene_info.keys():
-                print(f"Didn't find extras on scene for `{path}`")
-                continue
-            if 'asset_type' not in scene_info['extras'].keys():
-                print(f"Didn't find asset type on scene for `{path}`")
-                continue
-            if scene_info['extras']['asset_type'] != 'ASSET':
-                continue
-            if 'asset_id' not in scene_info['extras'].keys():
-                print(f"Didn't find asset ID on scene for `{path}`")
-                continue
-            found_assets[scene_info['extras']['asset_id']] = path
-
-        for k in found_assets.keys():
-            if k not in asset_index.keys():
-                print(f"Missing {k} at `{found_assets[k]}` in asset index!")
-        
-        del_ids = set()
-        for k in asset_index.keys():
-            if k not in found_assets.keys():
-                del_ids.add(k)
-
-        if not del_ids:
-            return {"FINISHED"}
-
-        print("Removing Asset Index Entries:")
-        for k in del_ids:
-            print(k)
-            pprint(asset_index.pop(k))
-        
-        write_asset_index(asset_index, overwrite=True)
+        collect_texture_store_garbage()
 
         return {"FINISHED"}
 
@@ -767,70 +1230,99 @@ class GLTFIO_OT_cleanup_material_index(bpy.types.Operator):
     def poll(cls, context):
         return bool(project_root())
 
+    @report_index_errors
     def execute(self, context):
 
-        asset_index = load_asset_index(index_type='material_index')
-        if not asset_index:
+        if not cleanup_index(scan_project(), 'material_index'):
             return {"CANCELLED"}
 
-        gltf_list = list_project_files_recursive(project_root(), '*.gltf')
-        found_assets = dict()
+        return {"FINISHED"}
 
-        for path in gltf_list:
-            try:
-                with open(str(path)) as file:
-                    data = json.load(file)
-            except:
-                print(f'WARNING: Could not read `{path}`')
-                continue
-            if 'materials' not in data.keys():
-                continue
-            for mat_info in data['materials']:
-                if 'extras' not in mat_info.keys():
-                    print(f"Didn't find extras on material {mat_info['name']} at `{path}`")
-                    continue
-                if 'asset_id' not in mat_info['extras'].keys():
-                    print(f"Didn't find asset ID on material {mat_info['name']} at `{path}`")
-                    continue
-                found_assets[mat_info['extras']['asset_id']] = path
+class GLTFIO_OT_cleanup_indexes(bpy.types.Operator):
+    """ 
+    """
+    bl_idname = "gltfio.cleanup_indexes"
+    bl_label = "Cleanup Indexes"
+    bl_description = "Clean up the asset and material index files with a single scan of the exported files."
+    bl_options = {"REGISTER", "UNDO"}
 
-        for k in found_assets.keys():
-            if k not in asset_index.keys():
-                print(f"Missing {k} at `{found_assets[k]}` in material index!")
-        
-        del_ids = set()
-        for k in asset_index.keys():
-            if k not in found_assets.keys():
-                del_ids.add(k)
-
-        if not del_ids:
-            return {"FINISHED"}
-
-        print("Removing Material Index Entries:")
-        for k in del_ids:
-            print(k)
-            pprint(asset_index.pop(k))
-        
-        write_asset_index(asset_index, overwrite=True, index_type='material_index')
+    @classmethod
+    def poll(cls, context):
+        return bool(project_root())
+
+    @report_index_errors
+    def execute(self, context):
+
+        project_scan = scan_project()
+        with index_session():
+            found_asset_index = cleanup_index(project_scan, 'asset_index')
+            found_material_index = cleanup_index(project_scan, 'material_index')
 
+        collect_texture_store_garbage()
+
+        unreferenced = [k for k in project_scan.assets.keys() if len(project_scan.references.get(k, [])) <= 1]
+        print(f"Scanned {len(project_scan.assets)} assets and {len(project_scan.materials)} materials, "
+              f"{len(unreferenced)} assets are not instanced by any other file")
+
+        if not (found_asset_index or found_material_index):
+            return {"CANCELLED"}
         return {"FINISHED"}
 
-def list_project_files_recursive(dir, filter: str):
-    match_files = []
-    files = []
-    for f in os.scandir(dir):
-        if f.is_dir():
-            match_files += list_project_files_recursive(f.path, filter)
-        else:
-            files += [str(Path(f.path))]
-    match_files += fnmatch.filter(files, filter)
-    return match_files
+GLTF_SCAN_CACHE = None
 
-def export_in_subprocess(file_path):
+def scan_project():
+    """ Read every exported file once and collect assets, materials and references, see `project.scan_project`.
+
+    The scan results stay cached in memory between calls, and on disk in the target directory.
+    """
+    global GLTF_SCAN_CACHE
+    config = project_config()
+    cache_path = config.gltf_scan_cache_path()
+    if not GLTF_SCAN_CACHE or GLTF_SCAN_CACHE.path != cache_path:
+        GLTF_SCAN_CACHE = gltf_scan.GltfScanCache(cache_path)
+    return project.scan_project(config, scan_cache=GLTF_SCAN_CACHE, dir_cache=PROJECT_DIR_CACHE)
+
+PROJECT_DIR_CACHE = file_walk.DirectoryCache()
+
+def source_search_prune_paths():
+    return project_config().source_prune_paths()
+
+def list_project_files_recursive(dir, filter, prune_paths=()):
+    return project_config().list_files(filter, dir, prune_paths=prune_paths, cache=PROJECT_DIR_CACHE)
+
+# Add-on preferences passed on to headless exports, which run without the user's preferences
+EXPORT_PREFERENCES = (
+    'project_dir',
+    'source_dir_rel',
+    'target_dir_rel',
+    'excluded_dirs',
+    'export_format',
+    'use_texture_store',
+    'texture_max_size',
+    'texture_power_of_two',
+    'profile_exports',
+    'profile_python',
+)
+
+def preferences_args():
+    addon_prefs = bpy.context.preferences.addons[__package__].preferences
+    preferences = {name: getattr(addon_prefs, name) for name in EXPORT_PREFERENCES}
+    if preferences['project_dir']:
+        # Relative to the current file, which the export process doesn't have open
+        preferences['project_dir'] = os.path.realpath(bpy.path.abspath(preferences['project_dir']))
+    return ['--preferences', json.dumps(preferences)]
+
+def apply_preferences(preferences):
+    addon_prefs = bpy.context.preferences.addons[__package__].preferences
+    for name, value in preferences.items():
+        setattr(addon_prefs, name, value)
+    invalidate_project_paths()
+
+def start_export_subprocess(file_path):
     blender_executable = bpy.app.binary_path
 
     try:
-        subprocess.run(
+        return subprocess.Popen(
             [
                 blender_executable,
                 str(file_path),
@@ -839,15 +1331,127 @@ def export_in_subprocess(file_path):
                 "--python",
                 Path(__file__).parent / 'export_all.py',
                 "--",
-                "-b"
+                "--force",
+                *preferences_args(),
             ],
-            check=True,
             stdout=subprocess.DEVNULL,
         )
-    except subprocess.CalledProcessError as ex:
+    except OSError as ex:
         print("Error running Blender: ", ex)
-        return []
+        return None
 
+def export_in_subprocess(file_path):
+    process = start_export_subprocess(file_path)
+    if not process:
+        return False
+    if process.wait() != 0:
+        print(f"Error running Blender: exit code {process.returncode} for `{file_path}`")
+        return False
+    return True
+
+WORKER_RESULT_PREFIX = 'GLTFIO_WORKER_RESULT '
+
+class ExportWorker:
+    """ Long-lived headless Blender process running export_worker.py.
+
+    Files are sent one path per line over stdin and results come back as
+    prefixed JSON lines on stdout. The process is restarted on the next
+    `submit` after it recycled itself or exited.
+    """
+
+    def __init__(self, max_files=0, max_memory=0):
+        self.max_files = max_files
+        self.max_memory = max_memory
+        self.preferences = preferences_args()
+        self.process = None
+        self.results = None
+        self.current = None
+
+    @property
+    def busy(self):
+        return self.current is not None
+
+    def start(self):
+        self.results = queue.Queue()
+        self.process = subprocess.Popen(
+            [
+                bpy.app.binary_path,
+                "--background",
+                "--factory-startup",
+                "--python",
+                Path(__file__).parent / 'export_worker.py',
+                "--",
+                "--max-files", str(self.max_files),
+                "--max-memory", str(self.max_memory),
+                "--force",
+                *self.preferences,
+            ],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            bufsize=1,
+        )
+        reader = threading.Thread(target=self._read_output, args=(self.process, self.results), daemon=True)
+        reader.start()
+
+    @staticmethod
+    def _read_output(process, results):
+        # Drain everything so Blender's own output can't block the pipe
+        for line in process.stdout:
+            if line.startswith(WORKER_RESULT_PREFIX):
+                results.put(json.loads(line[len(WORKER_RESULT_PREFIX):]))
+        results.put(None)
+
+    def submit(self, file_path):
+        if not self.process:
+            self.start()
+        self.current = str(file_path)
+        self.process.stdin.write(self.current + '\n')
+        self.process.stdin.flush()
+
+    def poll(self):
+        if not self.process:
+            return None
+        try:
+            result = self.results.get_nowait()
+        except queue.Empty:
+            return None
+        if result is None:
+            returncode = self.process.wait()
+            self.process = None
+            if not self.current:
+                return None
+            result = {'path': self.current, 'ok': False, 'error': f'Worker exited with code {returncode}'}
+        elif result.get('recycle'):
+            self.stop()
+        self.current = None
+        return result
+
+    def stop(self, timeout=10.):
+        if not self.process:
+            return
+        try:
+            self.process.stdin.close()
+            self.process.wait(timeout=timeout)
+        except (OSError, subprocess.TimeoutExpired):
+            self.process.terminate()
+        self.process = None
+
+def batch_export_jobs(context):
+    gltfio_props = context.scene.gltfIOGodotProperties
+    if gltfio_props.export_jobs > 0:
+        return gltfio_props.export_jobs
+    return os.cpu_count() or 1
+
+
+def find_dependent_files(manifest):
+    # Reads the library blocks of every .blend in the project, without opening them in Blender
+    blend_files = list_project_files_recursive(project_root(), '*.blend', source_search_prune_paths())
+    changed = changed_blend_files(blend_files, manifest)
+    if not changed:
+        return set()
+    graph = blend_file.build_dependency_graph(blend_files)
+    return blend_file.transitive_dependents(changed, blend_file.reverse_dependency_graph(graph))
 
 class GLTFIO_OT_batch_export(bpy.types.Operator):
     """ 
@@ -864,22 +1468,100 @@ class GLTFIO_OT_batch_export(bpy.types.Operator):
     _updating = False
     _calcs_done = False
     _timer = None
+    _running = []
+    _workers = []
+    _jobs = 1
+    _export_count = 0
+    _start_times = dict()
+    _results = []
 
     @classmethod
     def poll(cls, context):
         return True
 
-    def do_calcs(self):
-        if self.active_file_index == len(self.file_list):
-            self._calcs_done = True
+    def finish_file(self, path, ok, error='', duration=None):
+        if not ok:
+            print(f"Error exporting `{path}`: {error}")
+        if duration is None and path in self._start_times:
+            duration = time.perf_counter() - self._start_times[path]
+        self._results.append((path, ok, duration))
+        self._progress += 1. / self._export_count
+
+    def report(self):
+        """ Summary table of the batch, with the export profile of each file if profiling is enabled.
+        """
+        if not self._results:
             return
+        profile = load_asset_index('export_profile') or dict()
+        rows = []
+        for path, ok, duration in self._results:
+            entry = profile.get(manifest_source_key(path), dict())
+            collections = entry.get('collections', [])
+            peak_memory = max((c.get('peak_memory', 0) for c in collections), default=None)
+            rows.append([
+                manifest_source_key(path),
+                'ok' if ok else 'FAILED',
+                profiling.format_seconds(duration),
+                len(collections) if collections else '',
+                profiling.format_bytes(peak_memory) if peak_memory else '',
+            ])
+        print(profiling.format_table(['File', 'Status', 'Time', 'Collections', 'Peak Mem'], rows))
+
+    def collect_results(self):
+        for process, path in self._running[:]:
+            if process.poll() is None:
+                continue
+            self._running.remove((process, path))
+            self.finish_file(path, process.returncode == 0, f'exit code {process.returncode}')
 
-        f = self.file_list[self.active_file_index]
-        if f.export:
-            export_in_subprocess(f.path)
-            self._progress += 1. / len([f for f in self.file_list if f.export])
+        for worker in self._workers:
+            result = worker.poll()
+            if not result:
+                continue
+            print(f"Exported `{result['path']}` in {result.get('time', 0.):.1f}s")
+            self.finish_file(result['path'], result['ok'], result.get('error', ''), result.get('time'))
+
+    def next_file(self):
+        while self.active_file_index < len(self.file_list):
+            f = self.file_list[self.active_file_index]
+            self.active_file_index += 1
+            if f.export:
+                return f.path
+        return None
+
+    def do_calcs(self):
+        self.collect_results()
+
+        if self._workers:
+            for worker in self._workers:
+                if worker.busy:
+                    continue
+                path = self.next_file()
+                if not path:
+                    break
+                self._start_times[path] = time.perf_counter()
+                try:
+                    worker.submit(path)
+                except OSError as err:
+                    worker.stop()
+                    worker.current = None
+                    self.finish_file(path, False, err)
+            running = any(worker.busy for worker in self._workers)
+        else:
+            while len(self._running) < self._jobs:
+                path = self.next_file()
+                if not path:
+                    break
+                self._start_times[path] = time.perf_counter()
+                process = start_export_subprocess(path)
+                if not process:
+                    self.finish_file(path, False, 'could not start Blender')
+                    continue
+                self._running.append((process, path))
+            running = bool(self._running)
 
-        self.active_file_index += 1
+        if not running and self.active_file_index == len(self.file_list):
+            self._calcs_done = True
 
     def modal(self, context, event):
         gltfio_props = context.scene.gltfIOGodotProperties
@@ -891,6 +1573,7 @@ class GLTFIO_OT_batch_export(bpy.types.Operator):
             for area in context.screen.areas:
                 area.tag_redraw()
         if self._calcs_done:
+            self.report()
             return self.cancel(context)
 
         return {'PASS_THROUGH'}
@@ -901,6 +1584,18 @@ class GLTFIO_OT_batch_export(bpy.types.Operator):
         gltfio_props = context.scene.gltfIOGodotProperties
         context.window_manager.modal_handler_add(self)
         self._updating = False
+        self._calcs_done = False
+        self._running = []
+        self._start_times = dict()
+        self._results = []
+        self._jobs = batch_export_jobs(context)
+        self._export_count = len([f for f in self.file_list if f.export])
+        self._workers = []
+        if gltfio_props.use_export_workers:
+            self._workers = [
+                ExportWorker(gltfio_props.worker_max_files, gltfio_props.worker_max_memory)
+                for i in range(min(self._jobs, self._export_count))
+            ]
         self._timer = context.window_manager.event_timer_add(0.5, window=context.window)
         
         self.active_file_index = 0
@@ -911,6 +1606,14 @@ class GLTFIO_OT_batch_export(bpy.types.Operator):
         if self._timer:
             context.window_manager.event_timer_remove(self._timer)
             self._timer = None
+        for process, path in self._running:
+            if process.poll() is None:
+                print(f"Stopping export of `{path}`")
+                process.terminate()
+        self._running = []
+        for worker in self._workers:
+            worker.stop()
+        self._workers = []
         self._progress = 0.
         gltfio_props.export_progress = 0
         return
@@ -927,13 +1630,25 @@ class GLTFIO_OT_batch_export(bpy.types.Operator):
         else:
             search_dir = project_root()
 
-        file_list = list_project_files_recursive(search_dir, '*'+gltfio_props.filename_filter)
+        file_list = list_project_files_recursive(search_dir, '*'+gltfio_props.filename_filter, source_search_prune_paths())
         file_list.sort()
 
+        manifest = None
+        if gltfio_props.skip_up_to_date:
+            manifest = load_asset_index('export_manifest')
+
+        stale_files = None
+        if manifest:
+            stale_files = {f for f in file_list if not export_up_to_date(f, manifest)}
+            if gltfio_props.include_dependents:
+                stale_files |= find_dependent_files(manifest)
+
         for f in file_list:
             new_entry = self.file_list.add()
             new_entry.name = Path(f).name
             new_entry.path = f
+            if stale_files is not None:
+                new_entry.export = os.path.realpath(f) in stale_files or f in stale_files
 
         wm = context.window_manager
         return wm.invoke_props_dialog(self, width = 800)
@@ -956,6 +1671,7 @@ classes = [
     GLTFIO_OT_batch_export,
     GLTFIO_OT_cleanup_asset_index,
     GLTFIO_OT_cleanup_material_index,
+    GLTFIO_OT_cleanup_indexes,
 ]
 
 def register():
@@ -964,6 +1680,8 @@ def register():
     bpy.types.Collection.gltfIOGodotAssetProperties = bpy.props.PointerProperty(type=gltfIOGodotAssetProperties)
     bpy.types.Scene.gltfIOGodotProperties = bpy.props.PointerProperty(type=gltfIOGodotProperties)
     bpy.types.COLLECTION_PT_exporters.prepend(draw_export_collection)
+    bpy.app.handlers.load_post.append(project_paths_file_handler)
+    bpy.app.handlers.save_post.append(project_paths_file_handler)
 
 def unregister():
     for c in classes:
@@ -971,6 +1689,8 @@ def unregister():
     del bpy.types.Collection.gltfIOGodotAssetProperties
     del bpy.types.Scene.gltfIOGodotProperties
     bpy.types.COLLECTION_PT_exporters.remove(draw_export_collection)
+    bpy.app.handlers.load_post.remove(project_paths_file_handler)
+    bpy.app.handlers.save_post.remove(project_paths_file_handler)
 
 def draw_export_collection(self, context):
     collection = context.collection
@@ -988,6 +1708,8 @@ def draw_export_collection(self, context):
         layout.prop(props, 'root_type')
         layout.prop(props, 'append_parent_collection')
         layout.prop(props, 'placeholder_materials')
+        layout.prop(props, 'texture_max_size')
+        layout.prop(props, 'preserve_instancing')
     elif props.export_type=='ANIMATION':
         layout.prop(props, 'anim_type')
     layout.operator('gltfio.initialize_export_collection')
@@ -1016,6 +1738,7 @@ def pre_process_objects(collection):
                 continue
             ob.instance_type = 'NONE'
             ob['instance_asset_id'] = ob.instance_collection['asset_id']
+            TEMP_DATA.track_instancer(ob)
     
 def pre_process_materials(collection):
     props = collection.gltfIOGodotAssetProperties
@@ -1032,7 +1755,6 @@ def pre_process_materials(collection):
     if not mats:
         return
     
-    addon_prefs = bpy.context.preferences.addons[__package__].preferences
     path = Path(bpy.data.filepath)
     path = path.parent / path.stem
     path = path.relative_to(Path(project_root()))
@@ -1047,7 +1769,7 @@ def pre_process_materials(collection):
     assets = dict()
     for mat in mats:
         if mat.library or props.placeholder_materials:
-            dummy_mat = bpy.data.materials.new(f"DUMMY-{mat.name}")
+            dummy_mat = TEMP_DATA.track(bpy.data.materials.new(f"DUMMY-{mat.name}"), original=mat)
             mat.user_remap(dummy_mat)
             dummy_mat['asset_id'] = mat['asset_id']
             continue
@@ -1059,10 +1781,7 @@ def pre_process_materials(collection):
     write_asset_index(assets, index_type='material_index')
 
 def post_process_materials(collection):
-    for mat in bpy.data.materials:
-        if mat.name.startswith("DUMMY"):
-            mat.user_remap(bpy.data.materials.get('-'.join(mat.name.split('-')[1:])))
-            bpy.data.materials.remove(mat)
+    TEMP_DATA.cleanup_ids()
 
 
 def import_node_group(name, path):
@@ -1073,6 +1792,11 @@ def import_node_group(name, path):
     return bpy.data.node_groups.get(name)
 
 def ensure_node_group(name, path=''):
+    if EXPORT_SESSION:
+        return EXPORT_SESSION.node_group(name, path)
+    return find_or_import_node_group(name, path)
+
+def find_or_import_node_group(name, path=''):
     ng = bpy.data.node_groups.get(name)
     if ng:
         return ng
@@ -1080,7 +1804,11 @@ def ensure_node_group(name, path=''):
     if not path:
         path=str(Path(project_root()) / 'assets/nodes/pipeline.blend')
 
-    ng = import_node_group(name, path)
+    try:
+        ng = import_node_group(name, path)
+    except OSError as err:
+        print(f"ERROR: Could not link node group {name} from {path}: {err}")
+        return None
     
     return ng
 
@@ -1091,71 +1819,272 @@ def pre_process_vertex_colors(collection):
     export_settings.export_vertex_color_name = 'COLOR'
 
     ng_name = 'GLTFIO-write_vertex_color'
-    ng = ensure_node_group(ng_name)
 
+    # Objects without modifiers that share a mesh are written once per mesh
+    shared_meshes = dict()
+    color_meshes = dict()
+    modifier_obs = []
     for ob in collection.all_objects:
         if ob.type not in ['MESH', 'CURVE', 'CURVES']:
             continue
-        mod = ob.modifiers.new(name=ng_name,type='NODES')
+        if ob.type == 'MESH' and not ob.modifiers:
+            if ob.data not in color_meshes:
+                color_meshes[ob.data] = has_color_attributes(ob.data)
+            if color_meshes[ob.data]:
+                shared_meshes.setdefault(ob.data, []).append(ob)
+            continue
+        if not ob.modifiers and not has_color_attributes(ob.data):
+            continue
+        modifier_obs.append(ob)
+
+    bake_obs = [obs for obs in shared_meshes.values() if len(obs) > 1]
+    modifier_obs += [obs[0] for obs in shared_meshes.values() if len(obs) == 1]
+    if not bake_obs and not modifier_obs:
+        return
+
+    ng = ensure_node_group(ng_name)
+    if not ng:
+        return
+
+    for ob in modifier_obs:
+        mod = TEMP_DATA.track_modifier(ob, ob.modifiers.new(name=ng_name,type='NODES'))
         mod.node_group = ng
 
-def post_process_vertex_colors(collection):
-    ng_name = 'GLTFIO-write_vertex_color'
+    if bake_obs:
+        bake_shared_vertex_colors(bake_obs, ng)
+
+def has_color_attributes(data):
+    """ Whether the object data has any color attributes for the vertex color node group to write.
+
+    Legacy curves have none, their color can only come from modifiers.
+    """
+    if isinstance(data, bpy.types.Mesh):
+        return bool(data.color_attributes)
+    attributes = getattr(data, 'attributes', None)
+    if not attributes:
+        return False
+    return any(attr.data_type in {'FLOAT_COLOR', 'BYTE_COLOR'} for attr in attributes)
+
+def bake_shared_vertex_colors(shared_obs, ng):
+    """ Evaluate the vertex color node group once per shared mesh instead of once per object.
+
+    The node group is evaluated on one object of each group and the result is
+    stored as a temporary mesh, which all objects of the group use until the
+    export is cleaned up.
+    """
+    mods = []
+    for obs in shared_obs:
+        mod = obs[0].modifiers.new(name=ng.name, type='NODES')
+        mod.node_group = ng
+        mods.append((obs[0], mod))
+
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    baked_meshes = []
+    for obs in shared_obs:
+        ob_eval = obs[0].evaluated_get(depsgraph)
+        baked_meshes.append(bpy.data.meshes.new_from_object(ob_eval, preserve_all_data_layers=True, depsgraph=depsgraph))
+
+    for ob, mod in mods:
+        ob.modifiers.remove(mod)
+
+    for obs, baked in zip(shared_obs, baked_meshes):
+        TEMP_DATA.track(baked)
+        for ob in obs:
+            TEMP_DATA.track_data(ob)
+            ob.data = baked
+
+def pre_process_instancing(collection):
+    """ Bake object specific modifiers into temporary meshes, so the exporter doesn't need to apply modifiers.
+
+    Without applying modifiers, objects that share a mesh are exported as a
+    single glTF mesh used by several nodes. Armature modifiers are kept live
+    for skinning. Returns whether the export can run without applying
+    modifiers.
+    """
+    props = collection.gltfIOGodotAssetProperties
+    if not props.preserve_instancing:
+        return False
 
+    bake_obs = []
     for ob in collection.all_objects:
-        if ob.type not in ['MESH', 'CURVE', 'CURVES']:
+        if not ob.modifiers:
             continue
-        for mod in ob.modifiers:
-            if mod.type != 'NODES':
-                continue
-            if not mod.node_group:
-                continue
-            if mod.node_group.name == ng_name:
-                ob.modifiers.remove(mod)
+        if ob.type != 'MESH':
+            print(f"WARNING: Not preserving instancing for {collection.name}, {ob.name} has modifiers on {ob.type.lower()} data")
+            return False
+        if any(mod.show_viewport and mod.type != 'ARMATURE' for mod in ob.modifiers):
+            bake_obs.append(ob)
+
+    if bake_obs:
+        armature_mods = [mod for ob in bake_obs for mod in ob.modifiers if mod.type == 'ARMATURE' and mod.show_viewport]
+        for mod in armature_mods:
+            mod.show_viewport = False
+        depsgraph = bpy.context.evaluated_depsgraph_get()
+        baked_meshes = [
+            bpy.data.meshes.new_from_object(ob.evaluated_get(depsgraph), preserve_all_data_layers=True, depsgraph=depsgraph)
+            for ob in bake_obs
+        ]
+        for mod in armature_mods:
+            mod.show_viewport = True
+        for ob, baked in zip(bake_obs, baked_meshes):
+            TEMP_DATA.track(baked)
+            TEMP_DATA.track_data(ob)
+            ob.data = baked
+
+    report_instancing(collection)
+    return True
+
+def report_instancing(collection):
+    mesh_users = dict()
+    for ob in collection.all_objects:
+        if ob.type == 'MESH':
+            mesh_users.setdefault(ob.data, []).append(ob)
+    objects = sum(len(obs) for obs in mesh_users.values())
+    instances = objects - len(mesh_users)
+    vertices = sum((len(obs) - 1) * len(mesh.vertices) for mesh, obs in mesh_users.items())
+    if instances:
+        print(f"Instancing {len(mesh_users)} meshes on {objects} objects in {collection.name}, "
+              f"saving {instances} mesh copies with {vertices} vertices")
+    if EXPORT_SESSION and EXPORT_SESSION.current:
+        EXPORT_SESSION.current.extra['instancing'] = {
+            'meshes': len(mesh_users),
+            'objects': objects,
+            'saved_meshes': instances,
+            'saved_vertices': vertices,
+        }
+
+def post_process_vertex_colors(collection):
+    TEMP_DATA.cleanup_modifiers()
+
+class LayerCollectionMap:
+    """ Layer collections of every collection below a layer collection, in depth-first order.
+
+    Built in a single walk of the layer tree and reused for the whole export
+    session, instead of walking the tree for each lookup.
+    """
+
+    def __init__(self, layer_collection):
+        self.root = layer_collection
+        self.layer_collections = dict()
+        self.build()
+
+    def build(self):
+        self.layer_collections = dict()
+        stack = list(reversed(self.root.children))
+        while stack:
+            lcol = stack.pop()
+            self.layer_collections.setdefault(lcol.collection, []).append(lcol)
+            stack.extend(reversed(lcol.children))
+
+    def get(self, collection):
+        layer_collections = self.layer_collections.get(collection)
+        try:
+            if layer_collections and all(lcol.collection == collection for lcol in layer_collections):
+                return list(layer_collections)
+        except ReferenceError:
+            pass
+        # The hierarchy changed since the map was built, or the collection was linked afterwards
+        self.build()
+        return list(self.layer_collections.get(collection, []))
+
+LAYER_COLLECTION_MAP = None
+
+@contextmanager
+def layer_collection_session(view_layer):
+    """ Share one `LayerCollectionMap` of the view layer between all lookups until the outermost session ends.
+    """
+    global LAYER_COLLECTION_MAP
+    if LAYER_COLLECTION_MAP:
+        yield LAYER_COLLECTION_MAP
+        return
+    LAYER_COLLECTION_MAP = LayerCollectionMap(view_layer.layer_collection)
+    try:
+        yield LAYER_COLLECTION_MAP
+    finally:
+        LAYER_COLLECTION_MAP = None
 
 def find_layer_collections_by_collection(collection, layer_collection):
-    layer_collection_list = []
-    for lcol in layer_collection.children:
-        if lcol.collection == collection:
-            layer_collection_list.append(lcol)
-        layer_collection_list = layer_collection_list + find_layer_collections_by_collection(collection, lcol)
-    return layer_collection_list
-
-def include_recursive(layer_collection, collection):
-    global EXCLUDE_LAYER_COLLECTIONS
-    if layer_collection.exclude:
-        layer_collection.exclude = False
-        EXCLUDE_LAYER_COLLECTIONS.add(layer_collection)
-    for lcol in layer_collection.children:
-        include_recursive(lcol, collection)
+    if LAYER_COLLECTION_MAP and LAYER_COLLECTION_MAP.root == layer_collection:
+        return LAYER_COLLECTION_MAP.get(collection)
+    return LayerCollectionMap(layer_collection).get(collection)
 
-def exclude_recursive(layer_collection):
-    global EXCLUDE_LAYER_COLLECTIONS
-    if layer_collection in EXCLUDE_LAYER_COLLECTIONS:
-        layer_collection.exclude = True
-    for lcol in layer_collection.children:
-        exclude_recursive(lcol)
+def include_recursive(layer_collection, included):
+    """ Include `layer_collection` and everything below it, adding the ones that were excluded to `included` (top-down).
+    """
+    stack = [layer_collection]
+    while stack:
+        lcol = stack.pop()
+        if lcol.exclude:
+            lcol.exclude = False
+            included.append(lcol)
+        stack.extend(reversed(lcol.children))
+
+# Layer collections included for a whole export run by `batched_layer_collections`, None outside of one
+EXCLUDE_BATCH = None
+
+def iter_export_collections(collection):
+    """ `collection` and all collections below it that export_collection would export.
+    """
+    stack = [collection]
+    while stack:
+        col = stack.pop()
+        if col.exporters and not col.library and not col.override_library:
+            yield col
+        stack.extend(reversed(col.children))
+
+@contextmanager
+def batched_layer_collections(collections):
+    """ Include the layer collections needed to export all `collections` up front.
+
+    All collections then export against the same evaluated depsgraph, with a
+    single view layer update here and one when the exclude state is restored,
+    instead of two per exported collection.
+    """
+    global EXCLUDE_BATCH
+    if EXCLUDE_BATCH is not None:
+        yield
+        return
+    view_layer = bpy.context.view_layer
+    included = []
+    for collection in collections:
+        for lcol in find_layer_collections_by_collection(collection, view_layer.layer_collection):
+            include_recursive(lcol, included)
+    if included:
+        view_layer.update()
+    EXCLUDE_BATCH = included
+    try:
+        yield
+    finally:
+        EXCLUDE_BATCH = None
+        for lcol in included:
+            lcol.exclude = True
+        if included:
+            view_layer.update()
 
 def pre_process_collections(collection):
     global EXCLUDE_LAYER_COLLECTIONS
-    EXCLUDE_LAYER_COLLECTIONS = set()
+    EXCLUDE_LAYER_COLLECTIONS = []
+    if EXCLUDE_BATCH is not None:
+        return
     layer_collection_list = find_layer_collections_by_collection(collection, bpy.context.view_layer.layer_collection)
     for lcol in layer_collection_list:
-        include_recursive(lcol, collection)
+        include_recursive(lcol, EXCLUDE_LAYER_COLLECTIONS)
     if EXCLUDE_LAYER_COLLECTIONS:
         bpy.context.view_layer.update()
 
 def post_process_collections(collection):
     global EXCLUDE_LAYER_COLLECTIONS
-    layer_collection_list = find_layer_collections_by_collection(collection, bpy.context.view_layer.layer_collection)
-    for lcol in layer_collection_list:
-        exclude_recursive(lcol)
-    if EXCLUDE_LAYER_COLLECTIONS:
-        bpy.context.view_layer.update()
-    EXCLUDE_LAYER_COLLECTIONS = set()
+    if not EXCLUDE_LAYER_COLLECTIONS:
+        return
+    for lcol in EXCLUDE_LAYER_COLLECTIONS:
+        lcol.exclude = True
+    bpy.context.view_layer.update()
+    EXCLUDE_LAYER_COLLECTIONS = []
 
 def pre_export(export_settings):
     collection = bpy.data.collections[export_settings['gltf_collection']]
+    if EXPORT_SESSION:
+        EXPORT_SESSION.begin_collection(collection, export_settings)
 
     if not 'asset_id' in collection.keys():
         asset_id = generate_id(collection)
@@ -1175,27 +2104,38 @@ def pre_export(export_settings):
         if collection_props.anim_type == 'LOOP':
             bpy.context.scene.frame_end += 1
     else:
-        asset_info = generate_asset_info(collection, export_settings)
+        with export_stage('index'):
+            asset_info = generate_asset_info(collection, export_settings)
 
-        path = asset_info[asset_id]['filepath']
-        asset_info_r = read_asset_info_from_index(asset_id)
+            path = asset_info[asset_id]['filepath']
+            asset_info_r = read_asset_info_from_index(asset_id)
 
-        if not asset_info_r:
-            write_asset_index(asset_info)
-        elif asset_info_r['filepath'] != str(path):
-            asset_id = generate_id(collection)
-            asset_info = generate_asset_info(collection, export_settings)
-            write_asset_index(asset_info)
-        elif asset_info_r['name'] != str(path):
-            write_asset_index(asset_info)
+            if not asset_info_r:
+                write_asset_index(asset_info)
+            elif asset_info_r['filepath'] != str(path):
+                asset_id = generate_id(collection)
+                asset_info = generate_asset_info(collection, export_settings)
+                write_asset_index(asset_info)
+            elif asset_info_r['name'] != str(path):
+                write_asset_index(asset_info)
 
-    pre_process_collections(collection)
+    with export_stage('pre_process_collections'):
+        pre_process_collections(collection)
 
-    pre_process_objects(collection)
+    with export_stage('pre_process_objects'):
+        pre_process_objects(collection)
 
-    pre_process_materials(collection)
+    with export_stage('pre_process_materials'):
+        pre_process_materials(collection)
 
-    pre_process_vertex_colors(collection)
+    with export_stage('pre_process_vertex_colors'):
+        pre_process_vertex_colors(collection)
+
+    with export_stage('pre_process_instancing'):
+        if pre_process_instancing(collection):
+            export_settings['gltf_apply'] = False
+
+    count_export_data('objects', len(collection.all_objects))
 
     collection['asset_type'] = collection_props.export_type
     collection['root_type'] = collection_props.root_type
@@ -1207,85 +2147,95 @@ def pre_export(export_settings):
             and not os.path.isdir(export_settings['gltf_texturedirectory']):
         os.makedirs(export_settings['gltf_texturedirectory'])
 
-def post_process_image_textures(export_settings):
-    path = Path(export_settings['gltf_filepath'])
-
-    with open(str(path)) as file:
-        data = json.load(file)
-
-    if not 'images' in data.keys():
-        return
-    
-    root_dir = Path(project_root())
-    addon_prefs = bpy.context.preferences.addons[__package__].preferences
+    if EXPORT_SESSION:
+        EXPORT_SESSION.begin_exporter()
 
-    target_dir = root_dir / addon_prefs.target_dir_rel
+def collect_texture_store_garbage():
+    removed = project_config().collect_texture_store_garbage()
+    if removed:
+        print(f"Removed {removed} unused files from the texture store")
 
-    for image_info in data['images']:
-        if not 'extras' in image_info.keys():
-            print(f"Couldn't find extras on image {image_info['name']}")
-            continue
+def texture_resize_settings(collection):
+    addon_prefs = addon_preferences()
+    max_size = collection.gltfIOGodotAssetProperties.texture_max_size or addon_prefs.texture_max_size
+    return max_size, addon_prefs.texture_power_of_two
 
-        texture_dir = export_settings["gltf_texturedirectory"]
-        if texture_dir:
-            filepath = Path(os.path.realpath(bpy.path.abspath(f"//{texture_dir}/{image_info['uri']}", start=path.parent)))
-        else:
-            filepath = Path(os.path.realpath(bpy.path.abspath(f"//{image_info['uri']}", start=path.parent)))
-        target_path = target_dir / image_info['extras']['source_path']
-        print(f"Moving image texture file from {filepath} to {target_path}")
+def resize_image_file(filepath, cache, max_size, power_of_two):
+    """ Path of the resized version of an image file from the cache, resizing it on a miss.
 
-        target_path.parent.mkdir(parents=True, exist_ok=True)
-
-        if filepath == target_path:
-            continue
-
-        # copy image file
-        try:
-            shutil.copy2(filepath, target_path)
-        except OSError as err:
-            print("Error: % s" % err)
-            continue
-
-        # change path in gltf
-        uri = bpy.path.relpath(os.path.realpath(target_dir / image_info['extras']['source_path']), start=str(path.parent))
-        image_info['uri'] = str(uri)[2:]
-
-        # delete original
-        try:
-            os.remove(filepath)
-        except OSError as err:
-            print("Error: % s" % err)
+    Returns None if the image is kept at its size.
+    """
+    settings_key = textures.resize_settings_key(max_size, power_of_two)
+    digest = textures.file_digest(filepath)
+    suffix = Path(filepath).suffix
+    hit, cached_path = cache.lookup(digest, settings_key, suffix)
+    if hit:
+        return cached_path
+
+    image = bpy.data.images.load(str(filepath), check_existing=False)
+    try:
+        width, height = image.size
+        size = textures.fit_size(width, height, max_size, power_of_two)
+        if size == (width, height):
+            cache.mark_unchanged(digest, settings_key)
+            return None
+        print(f"Resizing image texture {filepath} from {width}x{height} to {size[0]}x{size[1]}")
+        cached_path = cache.path(digest, settings_key, suffix)
+        os.makedirs(os.path.dirname(cached_path), exist_ok=True)
+        tmp_path = f'{cached_path}.{os.getpid()}.tmp{suffix}'
+        image.scale(*size)
+        image.filepath_raw = tmp_path
+        image.save()
+        os.replace(tmp_path, cached_path)
+    finally:
+        bpy.data.images.remove(image)
+    return cached_path
 
-        # remove previous parent folder if empty
-        try:
-            filepath.parent.rmdir()
-        except:
-            continue
-    
-    with open(path, 'w') as file:
-        file.write(json.dumps(data, indent=4))
+def post_process_image_textures(export_settings):
+    collection = bpy.data.collections[export_settings['gltf_collection']]
+    max_size, power_of_two = texture_resize_settings(collection)
+    config = project_config()
+    resize_cache = config.resize_cache()
+
+    outputs, image_count = post_process.relocate_image_textures(
+        config,
+        export_settings['gltf_filepath'],
+        texture_dir=export_settings["gltf_texturedirectory"],
+        resize=lambda filepath: resize_image_file(filepath, resize_cache, max_size, power_of_two),
+        settings_key=textures.resize_settings_key(max_size, power_of_two),
+    )
+    count_export_data('images', image_count)
+    return outputs
 
 def post_export(export_settings):
     collection = bpy.data.collections[export_settings['gltf_collection']]
 
     collection_props = collection.gltfIOGodotAssetProperties
 
-    for ob in bpy.data.objects:
-        if 'instance_asset_id' in ob.keys():
-            if ob.type == 'EMPTY':
-                ob.instance_type = 'COLLECTION'
+    if EXPORT_SESSION:
+        EXPORT_SESSION.end_exporter()
+
+    TEMP_DATA.cleanup_instancers()
 
     if collection_props.export_type == 'ANIMATION':
         if collection_props.anim_type == 'LOOP':
             bpy.context.scene.frame_end -= 1
     
-    post_process_collections(collection)
+    with export_stage('post_process_collections'):
+        post_process_collections(collection)
 
-    post_process_materials(collection)
+    with export_stage('post_process_materials'):
+        post_process_materials(collection)
 
-    post_process_vertex_colors(collection)
+    with export_stage('post_process_vertex_colors'):
+        post_process_vertex_colors(collection)
 
-    post_process_image_textures(export_settings)
+    with export_stage('post_process_image_textures'):
+        outputs = post_process_image_textures(export_settings)
+    if ASSET_INDEX_MANAGER and outputs:
+        ASSET_INDEX_MANAGER.outputs += outputs
+    if EXPORT_SESSION:
+        EXPORT_SESSION.end_collection(outputs)
 
 
 def mark_visibility_info(ob):
@@ -1385,6 +2335,35 @@ def find_image_from_socket(socket):
             return image
     return None
 
+class ImageIndex:
+    """ Name lookup of bpy.data.images for one export, built once instead of per glTF image.
+
+    Images are found by their exact name, or else by any part of their name
+    before a dot, so `T_wood` finds `T_wood.png` and `T_wood.001`. Source
+    relative paths are resolved once per image.
+    """
+
+    def __init__(self):
+        self.images = dict()
+        self.source_paths = dict()
+        for image in bpy.data.images:
+            self.images.setdefault(image.name, image)
+        # Same as the first image whose name starts with `<name>.`
+        for image in bpy.data.images:
+            parts = image.name.split('.')
+            for i in range(1, len(parts)):
+                self.images.setdefault('.'.join(parts[:i]), image)
+
+    def get(self, name):
+        return self.images.get(name)
+
+    def source_path_rel(self, image):
+        path = self.source_paths.get(image)
+        if path is None:
+            path = Path(os.path.realpath(bpy.path.abspath(image.filepath, library=image.library))).relative_to(project_source_dir())
+            self.source_paths[image] = path
+        return path
+
 DEBUG = False
 
 class glTF2ExportUserExtension:
@@ -1398,6 +2377,8 @@ class glTF2ExportUserExtension:
 
     def pre_export_hook(self, export_settings):
         pre_export(export_settings)
+        self.session = EXPORT_SESSION
+        self.image_index = self.session.image_index() if self.session else ImageIndex()
 
     def post_export_hook(self, export_settings):
         post_export(export_settings)
@@ -1405,21 +2386,18 @@ class glTF2ExportUserExtension:
     def gather_image_hook(self, gltf2_image, b_image, blender_shader_sockets, export_settings):
         if DEBUG: print(f"Gather image {gltf2_image}")
 
-        addon_prefs = bpy.context.preferences.addons[__package__].preferences
-
         s = blender_shader_sockets[0].socket
         # image = find_image_from_socket(s) # FAILS WHEN SOCKET IS INSIDE NODEGROUP
         # Doing ugly name lookup instead smh
-        image = bpy.data.images.get(gltf2_image.uri.name)
-        if image is None:
-            image = [img for img in bpy.data.images if img.name.startswith(gltf2_image.uri.name+'.')][0]
+        image_index = getattr(self, 'image_index', None)
+        if image_index is None:
+            image_index = self.image_index = ImageIndex()
+        image = image_index.get(gltf2_image.uri.name)
         if not image:
             print(f"Couldn't find blender image {gltf2_image.uri.name} relating to socket {s}")
             return
         
-        root_dir = Path(project_root())
-
-        source_path_rel = Path(os.path.realpath(bpy.path.abspath(image.filepath))).relative_to(root_dir / addon_prefs.source_dir_rel)
+        source_path_rel = image_index.source_path_rel(image)
 
         if not gltf2_image.extras:
             gltf2_image.extras = dict()
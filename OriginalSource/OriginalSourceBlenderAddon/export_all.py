@@ -1,13 +1,80 @@
 import bpy
+import sys
+import json
+import argparse
+import contextlib
 from pathlib import Path
 
-for col in bpy.data.collections:
-    if col.library:
-        continue
-    if col.override_library:
-        continue
-    if not col.exporters:
-        continue
+def find_addon_module():
+    # The add-on is registered under a package name that depends on how it was installed
+    addon_dir = Path(__file__).resolve().parent
+    for module in list(sys.modules.values()):
+        module_file = getattr(module, '__file__', None)
+        if not module_file or Path(module_file).name != '__init__.py':
+            continue
+        if Path(module_file).resolve().parent == addon_dir:
+            return module
+    return None
 
-    with bpy.context.temp_override(collection=col):
-        bpy.ops.collection.export_all()
\ No newline at end of file
+def enable_addon(preferences=None):
+    """ The add-on module, enabled from this directory if Blender didn't load it.
+
+    Headless exports run with `--factory-startup`, which doesn't enable user
+    add-ons or load their preferences, so the preferences of the Blender
+    instance starting the export are passed in and applied.
+    """
+    addon = find_addon_module()
+    if not addon:
+        import addon_utils
+        addon_dir = Path(__file__).resolve().parent
+        if str(addon_dir.parent) not in sys.path:
+            sys.path.insert(0, str(addon_dir.parent))
+        addon = addon_utils.enable(addon_dir.name, default_set=False, handle_error=None)
+        if not addon:
+            raise RuntimeError(f"Could not enable the add-on from `{addon_dir}`")
+    if preferences:
+        addon.apply_preferences(preferences)
+    return addon
+
+def export_collections():
+    for col in bpy.data.collections:
+        if col.library:
+            continue
+        if col.override_library:
+            continue
+        if not col.exporters:
+            continue
+        yield col
+
+def export_all_collections(addon=None):
+    collections = list(export_collections())
+    if addon:
+        batch = addon.batched_layer_collections(collections)
+    else:
+        batch = contextlib.nullcontext()
+    with batch:
+        for col in collections:
+            with bpy.context.temp_override(collection=col):
+                bpy.ops.collection.export_all()
+
+def export_file(force=False, preferences=None):
+    addon = enable_addon(preferences)
+    if not force and addon.export_up_to_date(bpy.data.filepath):
+        print(f"Skipping `{bpy.data.filepath}`, exported files are up to date")
+        return False
+    is_dirty = bpy.data.is_dirty
+    with addon.export_session(bpy.context.view_layer) as session:
+        export_all_collections(addon)
+        addon.update_export_manifest(session.index, is_dirty)
+    return True
+
+def parse_args():
+    argv = sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else []
+    parser = argparse.ArgumentParser(prog='export_all.py')
+    parser.add_argument('--force', action='store_true', help='Export even if the outputs are up to date')
+    parser.add_argument('--preferences', type=json.loads, default=None, help='Add-on preferences as JSON')
+    return parser.parse_args(argv)
+
+if __name__ == '__main__':
+    args = parse_args()
+    export_file(force=args.force, preferences=args.preferences)
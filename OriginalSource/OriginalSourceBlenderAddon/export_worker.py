@@ -0,0 +1,86 @@
+# Long-lived headless export worker.
+#
+# Started as `blender --background --factory-startup --python export_worker.py -- [--max-files N] [--max-memory MB] [--preferences JSON]`.
+# Reads one .blend path per line from stdin, exports it the same way as export_all.py
+# and prints one JSON result line per file, prefixed with WORKER_RESULT_PREFIX.
+# The worker exits after N files or once its memory use exceeds the given limit,
+# so the caller can start a fresh process.
+import bpy
+import sys
+import os
+import json
+import time
+import argparse
+import traceback
+import importlib.util
+from pathlib import Path
+
+WORKER_RESULT_PREFIX = 'GLTFIO_WORKER_RESULT '
+
+def load_export_all():
+    path = Path(__file__).resolve().parent / 'export_all.py'
+    spec = importlib.util.spec_from_file_location('gltfio_export_all', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def memory_usage_mb():
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return 0.
+    # Peak usage is the best we get here; KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        return rss / 2**20
+    return rss / 2**10
+
+def parse_args():
+    argv = sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else []
+    parser = argparse.ArgumentParser(prog='export_worker.py')
+    parser.add_argument('--max-files', type=int, default=0)
+    parser.add_argument('--max-memory', type=int, default=0, help='Memory limit in MB')
+    parser.add_argument('--force', action='store_true', help='Export files even if their outputs are up to date')
+    parser.add_argument('--preferences', type=json.loads, default=None, help='Add-on preferences as JSON')
+    return parser.parse_args(argv)
+
+def report(result):
+    sys.stdout.write(WORKER_RESULT_PREFIX + json.dumps(result) + '\n')
+    sys.stdout.flush()
+
+def main():
+    args = parse_args()
+    export_all = load_export_all()
+    file_count = 0
+
+    for line in sys.stdin:
+        path = line.strip()
+        if not path:
+            continue
+        start = time.perf_counter()
+        result = {'path': path, 'ok': True}
+        try:
+            bpy.ops.wm.open_mainfile(filepath=path, load_ui=False)
+            result['exported'] = export_all.export_file(force=args.force, preferences=args.preferences)
+        except Exception as err:
+            traceback.print_exc()
+            result['ok'] = False
+            result['error'] = str(err)
+        file_count += 1
+        result['time'] = time.perf_counter() - start
+        result['memory'] = memory_usage_mb()
+        result['recycle'] = bool(
+            (args.max_files and file_count >= args.max_files)
+            or (args.max_memory and result['memory'] > args.max_memory)
+        )
+        report(result)
+        if result['recycle']:
+            break
+
+if __name__ == '__main__':
+    main()
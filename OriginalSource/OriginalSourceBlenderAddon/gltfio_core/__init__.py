@@ -0,0 +1,8 @@
+# Helpers of the add-on that don't depend on bpy.
+#
+# Everything in this package only uses the standard library, so it can be
+# imported from a plain Python interpreter by putting the add-on directory on
+# `sys.path` and importing `gltfio_core`.
+#
+# Index maintenance and texture relocation can be run on a project from the
+# command line with `python -m gltfio_core`, see `__main__.py`.
@@ -0,0 +1,123 @@
+""" Index maintenance and texture relocation of a project, without Blender.
+
+Run from the add-on directory:
+
+    python -m gltfio_core scan
+    python -m gltfio_core validate --project /path/to/project --target game
+    python -m gltfio_core cleanup --dry-run
+    python -m gltfio_core relocate-textures game/props/chair.gltf
+
+The project is found from the current directory unless `--project` is given.
+The subpaths and excluded folders default to those of the add-on preferences.
+"""
+import sys
+import argparse
+
+from . import asset_index, project, post_process
+
+INDEX_TYPES = ('asset_index', 'material_index')
+
+def project_config(args):
+    kwargs = {
+        'source_dir_rel': args.source,
+        'target_dir_rel': args.target,
+        'prune': project.parse_excluded_dirs(args.exclude),
+        'use_texture_store': args.texture_store,
+    }
+    if args.project:
+        return project.ProjectConfig(args.project, **kwargs)
+    config = project.ProjectConfig.find('.', **kwargs)
+    if not config:
+        sys.exit(f"Couldn't find a `{project.PROJECT_MARKER}` in the current directory or its parents, use --project")
+    return config
+
+def unreferenced_assets(project_scan):
+    return [k for k in project_scan.assets.keys() if len(project_scan.references.get(k, [])) <= 1]
+
+def scan(config, args):
+    project_scan = project.scan_project(config)
+    print(f"Scanned {len(project_scan.assets)} assets and {len(project_scan.materials)} materials, "
+          f"{len(unreferenced_assets(project_scan))} assets are not instanced by any other file")
+    return 0
+
+def validate(config, args):
+    """ Exit with 1 if an index is missing entries or has entries no exported file uses.
+    """
+    project_scan = project.scan_project(config)
+    manager = asset_index.AssetIndexManager(config)
+    problems = 0
+    for index_type in INDEX_TYPES:
+        index = manager.assets(index_type) or dict()
+        label = index_type.replace('_', ' ')
+        for k, path in project_scan.missing(index, index_type).items():
+            print(f"Missing {k} at `{path}` in {label}!")
+            problems += 1
+        for k in sorted(project_scan.orphans(index, index_type)):
+            print(f"Unused {k} in {label}")
+            problems += 1
+    print(f"{problems} problems found")
+    return 1 if problems else 0
+
+def cleanup(config, args):
+    project_scan = project.scan_project(config)
+    manager = asset_index.AssetIndexManager(config)
+    found = False
+    for index_type in INDEX_TYPES:
+        if asset_index.cleanup_index(manager, project_scan, index_type, dry_run=args.dry_run) is not None:
+            found = True
+    if args.dry_run:
+        return 0
+    try:
+        manager.flush(strict=True)
+    except asset_index.IndexWriteError as err:
+        sys.exit(str(err))
+    removed = config.collect_texture_store_garbage()
+    if removed:
+        print(f"Removed {removed} unused files from the texture store")
+    return 0 if found else 1
+
+def relocate_textures(config, args):
+    for gltf_path in args.files:
+        outputs, image_count = post_process.relocate_image_textures(config, gltf_path, texture_dir=args.texture_dir)
+        print(f"Relocated {image_count} images of {gltf_path}")
+    return 0
+
+def add_project_arguments(parser, defaults=True):
+    """ Project options, accepted before and after the command.
+
+    The command parsers don't set defaults, which would override the options
+    given before the command.
+    """
+    def default(value):
+        return value if defaults else argparse.SUPPRESS
+    parser.add_argument('--project', default=default(None), help='Project directory (default: found from the current directory)')
+    parser.add_argument('--source', default=default(''), help='Source directory subpath, relative to the project directory')
+    parser.add_argument('--target', default=default('game'), help='Target directory subpath, relative to the project directory')
+    parser.add_argument('--exclude', default=default('.godot, .git'), help='Comma separated folder names or patterns to skip')
+    parser.add_argument('--texture-store', action='store_true', default=default(False), help='Link relocated textures from the shared texture store')
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m gltfio_core', description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_project_arguments(parser)
+    project_arguments = argparse.ArgumentParser(add_help=False)
+    add_project_arguments(project_arguments, defaults=False)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    def add_command(name, help):
+        return commands.add_parser(name, help=help, parents=[project_arguments])
+
+    add_command('scan', 'Scan the exported glTF files and print a summary').set_defaults(func=scan)
+    add_command('validate', 'Check the asset and material index against the exported files').set_defaults(func=validate)
+    command = add_command('cleanup', 'Remove unused index entries and texture store files')
+    command.add_argument('--dry-run', action='store_true', help='Only print the unused entries')
+    command.set_defaults(func=cleanup)
+    command = add_command('relocate-textures', 'Move the image textures of exported glTF files to their source paths')
+    command.add_argument('files', nargs='+')
+    command.add_argument('--texture-dir', default='', help='Texture directory the files were exported with, relative to each file')
+    command.set_defaults(func=relocate_textures)
+
+    args = parser.parse_args(argv)
+    return args.func(project_config(args), args)
+
+if __name__ == '__main__':
+    sys.exit(main())
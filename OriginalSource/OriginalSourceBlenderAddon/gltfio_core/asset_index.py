@@ -0,0 +1,211 @@
+# Reading, merging and writing the index JSON files in the target directory.
+import os
+import json
+import time
+from pprint import pprint
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+# Top level key of each index JSON, `assets` unless listed here
+INDEX_KEYS = {
+    'export_manifest': 'files',
+    'export_profile': 'files',
+}
+
+def file_mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+class IndexLockError(Exception):
+    pass
+
+class IndexWriteError(Exception):
+    pass
+
+def _try_lock(fd):
+    try:
+        if fcntl:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+    except OSError:
+        return False
+    return True
+
+def _unlock(fd):
+    if fcntl:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+@contextmanager
+def file_lock(path, timeout=30.):
+    """ Exclusive lock on `<path>.lock`, raising `IndexLockError` if it isn't acquired within `timeout` seconds.
+
+    The lock is held by the OS, so it is released when a process holding it
+    dies and no stale lock files need to be removed.
+    """
+    lock_path = f'{path}.lock'
+    fd = os.open(lock_path, os.O_CREAT | os.O_RDWR)
+    try:
+        start = time.monotonic()
+        while not _try_lock(fd):
+            if time.monotonic() - start > timeout:
+                raise IndexLockError(f"Could not acquire lock `{lock_path}`")
+            time.sleep(0.05)
+        try:
+            yield
+        finally:
+            _unlock(fd)
+    finally:
+        os.close(fd)
+
+class AssetIndexManager:
+    """ Keeps the index JSON files of a `ProjectConfig` in memory.
+
+    Each index is read once and only re-read when its mtime changes on disk.
+    Changes are applied in memory and written with a single `flush`, merged
+    on top of whatever is on disk at that time. Without a config, there are
+    no indexes to read or write. Indexes whose lock isn't acquired within
+    `lock_timeout` seconds keep their updates for the next flush, see `pending`.
+    """
+
+    def __init__(self, config, lock_timeout=30.):
+        self.config = config
+        self.lock_timeout = lock_timeout
+        self.indexes = dict()
+        self.outputs = []
+
+    def _read(self, path, key='assets'):
+        mtime = file_mtime(path)
+        if mtime is None:
+            return dict(), None
+        try:
+            with open(str(path)) as file:
+                data = json.load(file)
+        except (OSError, ValueError) as err:
+            print("Error reading index JSON: % s" % err)
+            return dict(), mtime
+        return data.get(key, dict()), mtime
+
+    def _entry(self, index_type):
+        entry = self.indexes.get(index_type)
+        if entry is None:
+            if not self.config:
+                return None
+            entry = {
+                'path': self.config.index_path(index_type),
+                'key': INDEX_KEYS.get(index_type, 'assets'),
+                'mtime': None,
+                'assets': None,
+                'updates': dict(),
+                'overwrite': False,
+            }
+            self.indexes[index_type] = entry
+        if entry['assets'] is None or file_mtime(entry['path']) != entry['mtime']:
+            self._reload(entry)
+        return entry
+
+    def _reload(self, entry):
+        assets, entry['mtime'] = self._read(entry['path'], entry['key'])
+        if entry['overwrite']:
+            assets = dict()
+        assets.update(entry['updates'])
+        entry['assets'] = assets
+
+    def assets(self, index_type='asset_index'):
+        entry = self._entry(index_type)
+        if entry is None:
+            print("Couldn't find project root!")
+            return None
+        return entry['assets']
+
+    def update(self, assets, overwrite=False, index_type='asset_index'):
+        entry = self._entry(index_type)
+        if entry is None:
+            return
+        if overwrite:
+            entry['overwrite'] = True
+            entry['updates'] = dict()
+            entry['assets'] = dict()
+        entry['updates'].update(assets)
+        entry['assets'].update(assets)
+
+    def pending(self):
+        """ Index types with updates that aren't written yet.
+        """
+        return [index_type for index_type, entry in self.indexes.items() if entry['updates'] or entry['overwrite']]
+
+    def flush(self, strict=False):
+        """ Write the updates of every index, raising `IndexWriteError` with `strict` if any couldn't be written.
+        """
+        for index_type, entry in self.indexes.items():
+            if not entry['updates'] and not entry['overwrite']:
+                continue
+            path = entry['path']
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Parallel batch exports write to the same index, merge under a lock.
+            # Always re-read, a write within the same mtime tick goes unnoticed.
+            try:
+                with file_lock(path, self.lock_timeout):
+                    self._reload(entry)
+                    print(f'WRITING TO {index_type.upper()} JSON')
+                    tmp_path = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+                    with open(tmp_path, 'w') as file:
+                        file.write(json.dumps({entry['key']: entry['assets']}, indent=4))
+                    os.replace(tmp_path, path)
+                    entry['mtime'] = file_mtime(path)
+            except (OSError, IndexLockError) as err:
+                # The updates stay pending for the next flush
+                print("Error writing index JSON: % s" % err)
+                continue
+            entry['updates'] = dict()
+            entry['overwrite'] = False
+        pending = self.pending()
+        if strict and pending:
+            raise IndexWriteError(f"Couldn't write the {', '.join(pending)} JSON, its changes are lost")
+
+def asset_info(config, asset_id, asset_name, gltf_filepath):
+    """ Index entry of an exported asset, with its path relative to the target directory.
+    """
+    return {asset_id: {
+            "name": asset_name,
+            "filepath": str(config.target_relpath(gltf_filepath))
+            }
+        }
+
+def cleanup_index(manager, project_scan, index_type='asset_index', dry_run=False):
+    """ Report index entries missing from the index and remove those no exported file has anymore.
+
+    Returns None if there is no index, otherwise the removed asset IDs. With
+    `dry_run`, nothing is removed from the index.
+    """
+    label = index_type.replace('_', ' ')
+    index = manager.assets(index_type)
+    if not index:
+        return None
+    index = dict(index)
+
+    for k, path in project_scan.missing(index, index_type).items():
+        print(f"Missing {k} at `{path}` in {label}!")
+
+    del_ids = sorted(project_scan.orphans(index, index_type))
+    if not del_ids:
+        return del_ids
+
+    print(f"{'Unused' if dry_run else 'Removing'} {label.title()} Entries:")
+    for k in del_ids:
+        print(k)
+        pprint(index.pop(k))
+
+    if not dry_run:
+        manager.update(index, overwrite=True, index_type=index_type)
+    return del_ids
@@ -0,0 +1,264 @@
+# Minimal .blend reader for finding linked libraries without starting Blender.
+#
+# Only the file header, the block headers, the SDNA block and the `LI` blocks
+# are read. Uncompressed files are memory-mapped, so only the pages holding
+# those are touched.
+import os
+import re
+import gzip
+import mmap
+import struct
+from collections import defaultdict
+
+BLEND_MAGIC = b'BLENDER'
+GZIP_MAGIC = b'\x1f\x8b'
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+CODE_LIBRARY = b'LI\x00\x00'
+CODE_DNA = b'DNA1'
+CODE_END = b'ENDB'
+
+class BlendFileError(Exception):
+    pass
+
+class BlendHeader:
+    def __init__(self, size, pointer_size, endian, version, large_bhead):
+        self.size = size
+        self.pointer_size = pointer_size
+        self.endian = endian
+        self.version = version
+        self.large_bhead = large_bhead
+
+        if large_bhead:
+            # code, SDNAnr, old, len, nr
+            self._bhead = struct.Struct(endian + '4siQqq')
+        else:
+            ptr = 'Q' if pointer_size == 8 else 'I'
+            # code, len, old, SDNAnr, nr
+            self._bhead = struct.Struct(endian + '4si' + ptr + 'ii')
+
+    @property
+    def bhead_size(self):
+        return self._bhead.size
+
+    def read_bhead(self, buf, offset):
+        if self.large_bhead:
+            code, sdna_index, old, length, count = self._bhead.unpack_from(buf, offset)
+        else:
+            code, length, old, sdna_index, count = self._bhead.unpack_from(buf, offset)
+        return code, length, sdna_index
+
+def parse_header(buf):
+    if bytes(buf[:7]) != BLEND_MAGIC:
+        raise BlendFileError('Not a .blend file')
+    # Legacy header: `BLENDER_v404`, pointer size and endianness as characters
+    if buf[7:8] in (b'_', b'-') and buf[8:9] in (b'v', b'V'):
+        pointer_size = 8 if buf[7:8] == b'-' else 4
+        endian = '<' if buf[8:9] == b'v' else '>'
+        return BlendHeader(12, pointer_size, endian, int(bytes(buf[9:12])), False)
+    # Header since Blender 5.0: `BLENDER17-01v0500`, header size and file format version
+    match = re.match(rb'BLENDER(\d\d)-(\d\d)([vV])(\d{4})', bytes(buf[:17]))
+    if not match:
+        raise BlendFileError('Unknown .blend header')
+    if int(match.group(2)) != 1:
+        raise BlendFileError(f'Unsupported .blend file format version {int(match.group(2))}')
+    endian = '<' if match.group(3) == b'v' else '>'
+    return BlendHeader(int(match.group(1)), 8, endian, int(match.group(4)), True)
+
+class SDNA:
+    """ Struct layouts of a .blend file, parsed from its `DNA1` block.
+    """
+
+    def __init__(self, buf, offset, endian, pointer_size):
+        self.pointer_size = pointer_size
+        self.names = []
+        self.types = []
+        self.type_lengths = []
+        self.structs = dict()
+
+        def align(pos):
+            return offset + ((pos - offset + 3) & ~3)
+
+        def read_int(pos):
+            return struct.unpack_from(endian + 'i', buf, pos)[0]
+
+        def read_strings(pos, count):
+            strings = []
+            for i in range(count):
+                end = buf.find(b'\x00', pos)
+                strings.append(bytes(buf[pos:end]).decode('ascii', 'replace'))
+                pos = end + 1
+            return strings, pos
+
+        pos = offset
+        if bytes(buf[pos:pos + 8]) != b'SDNANAME':
+            raise BlendFileError('Invalid SDNA block')
+        count = read_int(pos + 8)
+        self.names, pos = read_strings(pos + 12, count)
+
+        pos = align(pos)
+        if bytes(buf[pos:pos + 4]) != b'TYPE':
+            raise BlendFileError('Invalid SDNA block')
+        count = read_int(pos + 4)
+        self.types, pos = read_strings(pos + 8, count)
+
+        pos = align(pos)
+        if bytes(buf[pos:pos + 4]) != b'TLEN':
+            raise BlendFileError('Invalid SDNA block')
+        self.type_lengths = list(struct.unpack_from(f'{endian}{count}h', buf, pos + 4))
+        pos = align(pos + 4 + 2 * count)
+
+        if bytes(buf[pos:pos + 4]) != b'STRC':
+            raise BlendFileError('Invalid SDNA block')
+        count = read_int(pos + 4)
+        pos += 8
+        for i in range(count):
+            type_index, field_count = struct.unpack_from(endian + 'hh', buf, pos)
+            pos += 4
+            fields = struct.unpack_from(f'{endian}{2 * field_count}h', buf, pos)
+            pos += 4 * field_count
+            self.structs[self.types[type_index]] = [
+                (self.types[fields[j]], self.names[fields[j + 1]]) for j in range(0, len(fields), 2)
+            ]
+
+    def field_size(self, type_name, field_name):
+        if field_name.startswith('*') or field_name.startswith('(*'):
+            size = self.pointer_size
+        else:
+            size = self.type_lengths[self.types.index(type_name)]
+        for dim in re.findall(r'\[(\d+)\]', field_name):
+            size *= int(dim)
+        return size
+
+    def field_offset(self, struct_name, field_name):
+        """ Offset and size of a field, matched by its name without array/pointer decoration.
+        """
+        offset = 0
+        for type_name, name in self.structs.get(struct_name, []):
+            size = self.field_size(type_name, name)
+            if name.split('[')[0] == field_name:
+                return offset, size
+            offset += size
+        return None
+
+def _read_compressed(filepath, magic):
+    if magic.startswith(GZIP_MAGIC):
+        with gzip.open(filepath, 'rb') as file:
+            return file.read()
+    try:
+        from compression import zstd
+        with open(filepath, 'rb') as file:
+            return zstd.decompress(file.read())
+    except ImportError:
+        pass
+    try:
+        import zstandard
+    except ImportError:
+        raise BlendFileError('Reading zstd compressed .blend files needs the `zstandard` module')
+    with open(filepath, 'rb') as file:
+        return zstandard.ZstdDecompressor().stream_reader(file, read_across_frames=True).read()
+
+def _scan_buffer(buf):
+    header = parse_header(buf)
+    library_blocks = []
+    sdna = None
+    offset = header.size
+    end = len(buf)
+    while offset + header.bhead_size <= end:
+        code, length, sdna_index = header.read_bhead(buf, offset)
+        data_offset = offset + header.bhead_size
+        if code == CODE_END:
+            break
+        if code == CODE_LIBRARY:
+            library_blocks.append((data_offset, length))
+        elif code == CODE_DNA:
+            sdna = SDNA(buf, data_offset, header.endian, header.pointer_size)
+        offset = data_offset + length
+
+    if not library_blocks:
+        return []
+    if not sdna:
+        raise BlendFileError('Missing SDNA block')
+
+    # Before Blender 3.0 the stored path was called `name`, `filepath` held the absolute path
+    field = sdna.field_offset('Library', 'name')
+    if not field or field[1] < 1024:
+        field = sdna.field_offset('Library', 'filepath')
+    if not field:
+        raise BlendFileError('Could not find the library path in the SDNA')
+    field_offset, field_size = field
+
+    paths = []
+    for data_offset, length in library_blocks:
+        if field_offset + field_size > length:
+            continue
+        raw = bytes(buf[data_offset + field_offset:data_offset + field_offset + field_size])
+        path = raw.split(b'\x00', 1)[0].decode('utf-8', 'replace')
+        if path:
+            paths.append(path)
+    return paths
+
+def read_library_paths(filepath):
+    """ Library paths as stored in the .blend file, usually relative (`//`) to it.
+    """
+    with open(filepath, 'rb') as file:
+        magic = file.read(4)
+        if magic.startswith(GZIP_MAGIC) or magic == ZSTD_MAGIC:
+            return _scan_buffer(_read_compressed(filepath, magic))
+        if os.fstat(file.fileno()).st_size == 0:
+            raise BlendFileError('Empty file')
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            return _scan_buffer(buf)
+
+def resolve_library_path(path, blend_path):
+    if path.startswith('//'):
+        path = os.path.join(os.path.dirname(blend_path), path[2:].replace('\\', '/'))
+    return os.path.normpath(os.path.realpath(path))
+
+# path -> (size, mtime_ns, dependencies)
+_DEPENDENCY_CACHE = dict()
+
+def library_dependencies(filepath):
+    """ Resolved paths of the libraries directly linked by a .blend file.
+    """
+    filepath = os.path.realpath(filepath)
+    stat = os.stat(filepath)
+    cached = _DEPENDENCY_CACHE.get(filepath)
+    if cached and cached[:2] == (stat.st_size, stat.st_mtime_ns):
+        return cached[2]
+    dependencies = sorted({resolve_library_path(path, filepath) for path in read_library_paths(filepath)})
+    _DEPENDENCY_CACHE[filepath] = (stat.st_size, stat.st_mtime_ns, dependencies)
+    return dependencies
+
+def build_dependency_graph(filepaths):
+    """ Map each .blend file to the libraries it links directly.
+    """
+    graph = dict()
+    for filepath in filepaths:
+        try:
+            graph[os.path.realpath(filepath)] = set(library_dependencies(filepath))
+        except (OSError, BlendFileError, struct.error) as err:
+            print(f"WARNING: Could not read libraries of `{filepath}`: {err}")
+    return graph
+
+def reverse_dependency_graph(graph):
+    """ Map each library to the .blend files that link it directly.
+    """
+    reverse = defaultdict(set)
+    for filepath, dependencies in graph.items():
+        for dependency in dependencies:
+            reverse[dependency].add(filepath)
+    return dict(reverse)
+
+def transitive_dependents(filepaths, reverse_graph):
+    """ All files that link any of `filepaths`, directly or through other libraries.
+    """
+    dependents = set()
+    stack = [os.path.realpath(filepath) for filepath in filepaths]
+    while stack:
+        for dependent in reverse_graph.get(stack.pop(), ()):
+            if dependent in dependents:
+                continue
+            dependents.add(dependent)
+            stack.append(dependent)
+    return dependents
@@ -0,0 +1,97 @@
+# Iterative project file walker with pruning and a directory listing cache.
+import os
+import fnmatch
+
+DEFAULT_PRUNE = ('.godot', '.git')
+
+def _is_wildcard(pattern):
+    return any(c in pattern for c in '*?[')
+
+def file_matcher(pattern):
+    """ Match function for a file name pattern, or a tuple of patterns.
+
+    Patterns of the form `*<suffix>` are matched with a plain suffix test,
+    anything else falls back to `fnmatch` on the file name.
+    """
+    if not isinstance(pattern, str):
+        matchers = [file_matcher(p) for p in pattern]
+        return lambda name: any(match(name) for match in matchers)
+    pattern = os.path.normcase(pattern)
+    if pattern.startswith('*') and not _is_wildcard(pattern[1:]):
+        suffix = pattern[1:]
+        return lambda name: os.path.normcase(name).endswith(suffix)
+    return lambda name: fnmatch.fnmatchcase(os.path.normcase(name), pattern)
+
+def dir_pruner(prune=DEFAULT_PRUNE, skip_hidden=True, prune_paths=()):
+    names = {os.path.normcase(p) for p in prune if not _is_wildcard(p)}
+    patterns = [os.path.normcase(p) for p in prune if _is_wildcard(p)]
+    paths = {os.path.normcase(os.path.realpath(p)) for p in prune_paths}
+
+    def should_prune(dirpath, name):
+        if skip_hidden and name.startswith('.'):
+            return True
+        name = os.path.normcase(name)
+        if name in names or any(fnmatch.fnmatchcase(name, p) for p in patterns):
+            return True
+        return bool(paths) and os.path.normcase(os.path.realpath(dirpath)) in paths
+    return should_prune
+
+def _scan_dir(dirpath):
+    files = []
+    dirs = []
+    with os.scandir(dirpath) as entries:
+        for entry in entries:
+            try:
+                if entry.is_dir():
+                    dirs.append(entry.name)
+                else:
+                    files.append(entry.name)
+            except OSError:
+                continue
+    files.sort()
+    dirs.sort()
+    return files, dirs
+
+class DirectoryCache:
+    """ Directory listings, reused while the directory's mtime is unchanged.
+
+    Adding, removing or renaming an entry updates the mtime of the directory
+    holding it, so unchanged subtrees are walked with a single `stat` per
+    directory instead of a full listing.
+    """
+
+    def __init__(self):
+        self.entries = dict()
+
+    def listing(self, dirpath):
+        mtime = os.stat(dirpath).st_mtime_ns
+        cached = self.entries.get(dirpath)
+        if cached and cached[0] == mtime:
+            return cached[1], cached[2]
+        files, dirs = _scan_dir(dirpath)
+        self.entries[dirpath] = (mtime, files, dirs)
+        return files, dirs
+
+    def clear(self):
+        self.entries.clear()
+
+def iter_project_files(root, pattern='*', prune=DEFAULT_PRUNE, skip_hidden=True, prune_paths=(), cache=None):
+    """ Yield the paths of all files below `root` whose name matches `pattern` (or any of a tuple of patterns).
+    """
+    match = file_matcher(pattern)
+    should_prune = dir_pruner(prune, skip_hidden, prune_paths)
+    stack = [str(root)]
+    while stack:
+        dirpath = stack.pop()
+        try:
+            files, dirs = cache.listing(dirpath) if cache else _scan_dir(dirpath)
+        except OSError as err:
+            print(f"WARNING: Could not list `{dirpath}`: {err}")
+            continue
+        for name in files:
+            if match(name):
+                yield os.path.join(dirpath, name)
+        for name in reversed(dirs):
+            path = os.path.join(dirpath, name)
+            if not should_prune(path, name):
+                stack.append(path)
@@ -0,0 +1,97 @@
+# Reading and patching the JSON of .gltf and binary .glb files.
+#
+# The JSON chunk of a .glb is located through its headers and patched in
+# place when the new JSON fits, otherwise the file is rewritten with the BIN
+# chunk copied over from a memoryview of the original, without decoding it.
+import os
+import json
+import mmap
+import struct
+
+GLB_MAGIC = b'glTF'
+GLB_VERSION = 2
+CHUNK_JSON = 0x4E4F534A
+CHUNK_BIN = 0x004E4942
+
+# magic, version, total length
+_HEADER = struct.Struct('<4sII')
+# chunk length, chunk type
+_CHUNK = struct.Struct('<II')
+
+class GlbError(Exception):
+    pass
+
+def is_glb(buf):
+    return bytes(buf[:4]) == GLB_MAGIC
+
+def _read_json_chunk_length(buf):
+    if len(buf) < _HEADER.size + _CHUNK.size:
+        raise GlbError('Truncated GLB header')
+    magic, version, length = _HEADER.unpack_from(buf, 0)
+    if magic != GLB_MAGIC:
+        raise GlbError('Not a GLB file')
+    if version != GLB_VERSION:
+        raise GlbError(f'Unsupported GLB version {version}')
+    chunk_length, chunk_type = _CHUNK.unpack_from(buf, _HEADER.size)
+    if chunk_type != CHUNK_JSON:
+        raise GlbError('First GLB chunk is not JSON')
+    return chunk_length
+
+def json_chunk(buf):
+    """ Start and end offset of the JSON chunk data in a .glb buffer.
+    """
+    start = _HEADER.size + _CHUNK.size
+    end = start + _read_json_chunk_length(buf)
+    if end > len(buf):
+        raise GlbError('Truncated GLB JSON chunk')
+    return start, end
+
+def _pad(data, length=None):
+    # Chunks are 4-byte aligned, the JSON chunk is padded with spaces
+    if length is None:
+        length = (len(data) + 3) & ~3
+    return data + b' ' * (length - len(data))
+
+def load_json(filepath):
+    """ The glTF JSON of a .gltf or .glb file.
+    """
+    with open(filepath, 'rb') as file:
+        head = file.read(_HEADER.size + _CHUNK.size)
+        if not is_glb(head):
+            file.seek(0)
+            return json.load(file)
+        chunk_length = _read_json_chunk_length(head)
+        data = file.read(chunk_length)
+        if len(data) != chunk_length:
+            raise GlbError('Truncated GLB JSON chunk')
+    return json.loads(data)
+
+def _write_glb(filepath, data):
+    encoded = json.dumps(data, separators=(',', ':')).encode()
+    with open(filepath, 'r+b') as file:
+        with mmap.mmap(file.fileno(), 0) as buf:
+            start, end = json_chunk(buf)
+            if len(encoded) <= end - start:
+                # Fits into the existing chunk, only the JSON bytes are written
+                buf[start:end] = _pad(encoded, end - start)
+                return
+
+            tmp_path = f'{filepath}.{os.getpid()}.tmp'
+            encoded = _pad(encoded)
+            with memoryview(buf) as view, view[end:] as rest, open(tmp_path, 'wb') as tmp_file:
+                tmp_file.write(_HEADER.pack(GLB_MAGIC, GLB_VERSION, start + len(encoded) + len(rest)))
+                tmp_file.write(_CHUNK.pack(len(encoded), CHUNK_JSON))
+                tmp_file.write(encoded)
+                tmp_file.write(rest)
+    os.replace(tmp_path, filepath)
+
+def save_json(filepath, data):
+    """ Write the glTF JSON back to a .gltf or .glb file, keeping any binary chunk as is.
+    """
+    with open(filepath, 'rb') as file:
+        glb = is_glb(file.read(4))
+    if glb:
+        _write_glb(filepath, data)
+        return
+    with open(filepath, 'w') as file:
+        file.write(json.dumps(data, indent=4))
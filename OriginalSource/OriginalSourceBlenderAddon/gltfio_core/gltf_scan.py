@@ -0,0 +1,281 @@
+# Fast extraction of the pipeline metadata from exported .gltf and .glb files.
+#
+# Only the requested top level keys of the glTF JSON are decoded. Everything
+# else, embedded base64 buffers included, is skipped over without being
+# decoded, reading from a memory-mapped file.
+import os
+import re
+import json
+import mmap
+from concurrent.futures import ThreadPoolExecutor
+
+from . import glb
+
+_WHITESPACE = re.compile(rb'[ \t\n\r]*')
+_STRING = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"')
+_STRUCTURE = re.compile(rb'["{}\[\]]')
+_SCALAR = re.compile(rb'[^,}\]\s]*')
+
+class GltfScanError(Exception):
+    pass
+
+def _skip_whitespace(buf, pos):
+    return _WHITESPACE.match(buf, pos).end()
+
+def _skip_string(buf, pos):
+    # bytes.find is much faster than a regex on long base64 strings
+    pos += 1
+    while True:
+        end = buf.find(b'"', pos)
+        if end == -1:
+            raise GltfScanError('Unterminated JSON string')
+        backslash = end - 1
+        while buf[backslash] == 0x5c:
+            backslash -= 1
+        if (end - backslash) % 2:
+            return end + 1
+        pos = end + 1
+
+def _skip_value(buf, pos):
+    char = buf[pos:pos + 1]
+    if char == b'"':
+        return _skip_string(buf, pos)
+    if char not in (b'{', b'['):
+        return _SCALAR.match(buf, pos).end()
+    depth = 1
+    pos += 1
+    while depth:
+        match = _STRUCTURE.search(buf, pos)
+        if not match:
+            raise GltfScanError('Unexpected end of JSON')
+        char = match.group()
+        if char == b'"':
+            pos = _skip_string(buf, match.start())
+            continue
+        depth += 1 if char in (b'{', b'[') else -1
+        pos = match.end()
+    return pos
+
+def read_json_keys(buf, keys, start=0, end=None):
+    """ Decode only the given top level keys of the JSON object in `buf[start:end]`.
+    """
+    keys = set(keys)
+    found = dict()
+    end = len(buf) if end is None else end
+    pos = _skip_whitespace(buf, start)
+    if buf[pos:pos + 1] != b'{':
+        raise GltfScanError('Expected a JSON object')
+    pos += 1
+    while pos < end:
+        pos = _skip_whitespace(buf, pos)
+        char = buf[pos:pos + 1]
+        if char == b'}':
+            break
+        if char == b',':
+            pos += 1
+            continue
+        match = _STRING.match(buf, pos)
+        if not match:
+            raise GltfScanError(f'Expected a key at offset {pos}')
+        key = json.loads(match.group())
+        pos = _skip_whitespace(buf, match.end())
+        if buf[pos:pos + 1] != b':':
+            raise GltfScanError(f'Expected `:` at offset {pos}')
+        pos = _skip_whitespace(buf, pos + 1)
+        value_end = _skip_value(buf, pos)
+        if key in keys:
+            found[key] = json.loads(bytes(buf[pos:value_end]))
+            if len(found) == len(keys):
+                break
+        pos = value_end
+    return found
+
+def read_gltf_keys(filepath, keys):
+    with open(filepath, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            raise GltfScanError('Empty file')
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            if glb.is_glb(buf):
+                start, end = glb.json_chunk(buf)
+                return read_json_keys(buf, keys, start, end)
+            return read_json_keys(buf, keys)
+
+def summarize_gltf(filepath):
+    """ The parts of an exported glTF that the index cleanup needs.
+    """
+    data = read_gltf_keys(filepath, ('scenes', 'materials', 'nodes'))
+    scenes = data.get('scenes') or [dict()]
+    instance_ids = set()
+    for node in data.get('nodes', []):
+        extras = node.get('extras')
+        if isinstance(extras, dict) and extras.get('instance_asset_id'):
+            instance_ids.add(extras['instance_asset_id'])
+    return {
+        'scene_extras': scenes[0].get('extras'),
+        'materials': [
+            {'name': mat.get('name', ''), 'extras': mat.get('extras')}
+            for mat in data.get('materials', [])
+        ],
+        'instance_asset_ids': sorted(instance_ids),
+    }
+
+class GltfScanCache:
+    """ Scan results keyed by file path, valid while size and mtime match.
+
+    With a `path`, the cache is loaded from and saved to a JSON file so
+    results survive between sessions.
+    """
+    version = 2
+
+    def __init__(self, path=None):
+        self.path = path
+        self.entries = dict()
+        self.dirty = False
+        if path:
+            self.load()
+
+    def load(self):
+        try:
+            with open(self.path) as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return
+        if data.get('version') != self.version:
+            return
+        self.entries = {k: tuple(v) for k, v in data.get('files', dict()).items()}
+
+    def save(self):
+        if not self.path or not self.dirty:
+            return
+        tmp_path = f'{self.path}.{os.getpid()}.tmp'
+        try:
+            with open(tmp_path, 'w') as file:
+                json.dump({'version': self.version, 'files': self.entries}, file)
+            os.replace(tmp_path, self.path)
+        except OSError as err:
+            print("Error writing glTF scan cache: % s" % err)
+            return
+        self.dirty = False
+
+    def get(self, filepath, stat):
+        entry = self.entries.get(filepath)
+        if entry and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+            return entry[2]
+        return None
+
+    def set(self, filepath, stat, summary):
+        self.entries[filepath] = (stat.st_size, stat.st_mtime_ns, summary)
+        self.dirty = True
+
+    def prune(self, filepaths):
+        for filepath in set(self.entries) - set(filepaths):
+            del self.entries[filepath]
+            self.dirty = True
+
+def _scan_file(filepath):
+    try:
+        return summarize_gltf(filepath)
+    except (OSError, ValueError, GltfScanError, glb.GlbError) as err:
+        print(f'WARNING: Could not read `{filepath}`: {err}')
+        return None
+
+def scan_gltf_files(filepaths, cache=None, max_workers=None):
+    """ Summaries of the given glTF files, read in parallel.
+
+    Files that couldn't be read map to None. Only files missing from the
+    cache, or changed since, are read.
+    """
+    filepaths = [str(filepath) for filepath in filepaths]
+    results = dict()
+    pending = []
+    for filepath in filepaths:
+        try:
+            stat = os.stat(filepath)
+        except OSError as err:
+            print(f'WARNING: Could not read `{filepath}`: {err}')
+            results[filepath] = None
+            continue
+        summary = cache.get(filepath, stat) if cache else None
+        if summary is None:
+            pending.append((filepath, stat))
+        else:
+            results[filepath] = summary
+
+    if pending:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            summaries = executor.map(_scan_file, [filepath for filepath, stat in pending])
+            for (filepath, stat), summary in zip(pending, summaries):
+                results[filepath] = summary
+                if cache is not None and summary is not None:
+                    cache.set(filepath, stat, summary)
+
+    if cache is not None:
+        cache.prune(filepaths)
+    return results
+
+class ProjectScan:
+    """ Everything the index maintenance needs, gathered in one pass over the glTF summaries.
+
+    `assets` and `materials` map the asset IDs found in exported files to the
+    file defining them, `references` maps asset IDs to all files that use
+    them (as asset, material, instance or animation reference).
+    """
+
+    def __init__(self, summaries):
+        self.assets = dict()
+        self.materials = dict()
+        self.references = dict()
+        self.warnings = []
+
+        for path, summary in summaries.items():
+            if not summary:
+                continue
+            self._add_scene(path, summary['scene_extras'])
+            for mat_info in summary['materials']:
+                extras = mat_info['extras']
+                if not extras:
+                    self.warnings.append(f"Didn't find extras on material {mat_info['name']} at `{path}`")
+                    continue
+                if 'asset_id' not in extras.keys():
+                    self.warnings.append(f"Didn't find asset ID on material {mat_info['name']} at `{path}`")
+                    continue
+                self.materials[extras['asset_id']] = path
+                self._add_reference(extras['asset_id'], path)
+            for asset_id in summary.get('instance_asset_ids', []):
+                self._add_reference(asset_id, path)
+
+        self.references = {k: sorted(v) for k, v in self.references.items()}
+
+    def _add_reference(self, asset_id, path):
+        self.references.setdefault(asset_id, set()).add(path)
+
+    def _add_scene(self, path, extras):
+        if not extras:
+            self.warnings.append(f"Didn't find extras on scene for `{path}`")
+            return
+        if extras.get('ref_asset_id'):
+            self._add_reference(extras['ref_asset_id'], path)
+        if 'asset_type' not in extras.keys():
+            self.warnings.append(f"Didn't find asset type on scene for `{path}`")
+            return
+        if extras['asset_type'] != 'ASSET':
+            return
+        if 'asset_id' not in extras.keys():
+            self.warnings.append(f"Didn't find asset ID on scene for `{path}`")
+            return
+        self.assets[extras['asset_id']] = path
+        self._add_reference(extras['asset_id'], path)
+
+    def found(self, index_type):
+        return self.materials if index_type == 'material_index' else self.assets
+
+    def missing(self, index, index_type='asset_index'):
+        """ Asset IDs found in exported files but not in the index.
+        """
+        return {k: v for k, v in self.found(index_type).items() if k not in index}
+
+    def orphans(self, index, index_type='asset_index'):
+        """ Index entries whose asset isn't in any exported file anymore.
+        """
+        found = self.found(index_type)
+        return {k for k in index.keys() if k not in found}
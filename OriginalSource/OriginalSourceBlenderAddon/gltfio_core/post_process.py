@@ -0,0 +1,84 @@
+# Post-processing of exported glTF files that only touches files on disk.
+import os
+import shutil
+from pathlib import Path
+from urllib.parse import unquote
+
+from . import glb, textures
+
+def gltf_output_files(path, data):
+    """ The glTF file and the external buffers and images it references.
+    """
+    path = Path(path)
+    outputs = [path]
+    for item in data.get('buffers', []) + data.get('images', []):
+        uri = item.get('uri')
+        if not uri or uri.startswith('data:'):
+            continue
+        outputs.append(Path(os.path.normpath(path.parent / unquote(uri))))
+    return outputs
+
+def relocate_image_textures(config, gltf_path, texture_dir='', resize=None, settings_key=''):
+    """ Move the image files of an exported glTF file to the `source_path` in their extras.
+
+    `resize` is called with the path of each exported image and returns the
+    path of a resized version, or None to keep it. Resized images are written
+    over the exported file and moved to a variant path named after
+    `settings_key`. Images embedded in a .glb are neither moved nor resized.
+    Returns the output files and the number of images.
+    """
+    path = Path(gltf_path)
+
+    data = glb.load_json(path)
+    images = data.get('images', [])
+    if not images:
+        return gltf_output_files(path, data), 0
+
+    embedded = [image_info for image_info in images if 'uri' not in image_info.keys()]
+    if embedded and resize and settings_key:
+        print(f"Warning: Not resizing {len(embedded)} image textures embedded in {path.name}, "
+              f"the max texture size only applies to glTF Separate exports")
+
+    target_dir = config.target_dir
+
+    moves = []
+    for image_info in images:
+        if not 'extras' in image_info.keys():
+            print(f"Couldn't find extras on image {image_info['name']}")
+            continue
+        if 'uri' not in image_info.keys():
+            continue
+
+        filepath = Path(os.path.realpath(path.parent / (texture_dir or '') / unquote(image_info['uri'])))
+        target_path = target_dir / image_info['extras']['source_path']
+        if resize and settings_key:
+            try:
+                resized_path = resize(filepath)
+            except (OSError, RuntimeError) as err:
+                print(f"Error resizing image texture {filepath}: {err}")
+                resized_path = None
+            if resized_path:
+                shutil.copyfile(resized_path, filepath)
+                target_path = Path(textures.resized_variant_path(target_path, settings_key))
+        print(f"Moving image texture file from {filepath} to {target_path}")
+        moves.append((image_info, filepath, target_path))
+
+    results = textures.relocate_files(
+        [(filepath, target_path) for image_info, filepath, target_path in moves],
+        store=config.texture_store(),
+    )
+
+    changed = False
+    for (image_info, filepath, target_path), result in zip(moves, results):
+        if result == textures.FAILED:
+            continue
+        # change path in gltf
+        uri = Path(os.path.relpath(os.path.realpath(target_path), start=os.path.realpath(path.parent))).as_posix()
+        if unquote(image_info['uri']) != uri:
+            image_info['uri'] = uri
+            changed = True
+
+    if changed:
+        glb.save_json(path, data)
+
+    return gltf_output_files(path, data), len(images)
@@ -0,0 +1,121 @@
+# Wall time, memory and cProfile measurements of the export pipeline stages.
+import io
+import time
+import pstats
+import cProfile
+import tracemalloc
+from contextlib import contextmanager
+
+class StageTimer:
+    """ Accumulated wall time per named stage.
+    """
+
+    def __init__(self):
+        self.stages = dict()
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def add_time(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0.) + seconds
+
+class CollectionProfile(StageTimer):
+    """ Measurements of exporting one collection.
+
+    With `trace_memory`, the peak of Python memory allocations during the
+    export is recorded, which needs `tracemalloc` to be tracing already. With
+    `use_cprofile`, the export runs under cProfile.
+    """
+
+    def __init__(self, name, filepath='', trace_memory=False, use_cprofile=False):
+        super().__init__()
+        self.name = name
+        self.filepath = filepath
+        self.counts = dict()
+        self.outputs = []
+        self.extra = dict()
+        self.time = None
+        self.peak_memory = None
+        self.trace_memory = trace_memory and tracemalloc.is_tracing()
+        self.profiler = cProfile.Profile() if use_cprofile else None
+        self.start_time = time.perf_counter()
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        if self.profiler:
+            self.profiler.enable()
+
+    def finish(self):
+        if self.profiler:
+            self.profiler.disable()
+        self.time = time.perf_counter() - self.start_time
+        if self.trace_memory:
+            self.peak_memory = tracemalloc.get_traced_memory()[1]
+
+    def profile_stats(self, limit=20):
+        if not self.profiler:
+            return ''
+        stream = io.StringIO()
+        stats = pstats.Stats(self.profiler, stream=stream)
+        stats.sort_stats('cumulative').print_stats(limit)
+        return stream.getvalue()
+
+    def dump_profile(self, path):
+        if self.profiler:
+            self.profiler.dump_stats(str(path))
+
+    def to_dict(self):
+        data = {
+            'collection': self.name,
+            'filepath': str(self.filepath),
+            'time': self.time,
+            'stages': dict(self.stages),
+            'counts': dict(self.counts),
+            'outputs': [str(output) for output in self.outputs],
+        }
+        if self.peak_memory is not None:
+            data['peak_memory'] = self.peak_memory
+        data.update(self.extra)
+        return data
+
+@contextmanager
+def memory_tracing(enabled=True):
+    """ Trace Python memory allocations for the duration, unless something else is tracing already.
+    """
+    started = enabled and not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    try:
+        yield
+    finally:
+        if started:
+            tracemalloc.stop()
+
+def format_table(header, rows):
+    """ Plain text table with the columns aligned, the first column left aligned and all others right aligned.
+    """
+    rows = [[str(cell) for cell in row] for row in [header] + rows]
+    widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+    lines = []
+    for n, row in enumerate(rows):
+        cells = [row[0].ljust(widths[0])] + [cell.rjust(width) for cell, width in zip(row[1:], widths[1:])]
+        lines.append('  '.join(cells).rstrip())
+        if n == 0:
+            lines.append('  '.join('-' * width for width in widths))
+    return '\n'.join(lines)
+
+def format_seconds(seconds):
+    return '' if seconds is None else f'{seconds:.2f}s'
+
+def format_bytes(size):
+    if size is None:
+        return ''
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return f'{size:.0f}{unit}'
+        size /= 1024
+    return f'{size:.1f}GB'
@@ -0,0 +1,150 @@
+# Project layout: where sources, exports and the pipeline's own files live.
+import os
+from pathlib import Path
+
+from . import file_walk, gltf_scan, textures
+
+# File or directory marking the root of a Blender project
+PROJECT_MARKER = '.blender_project'
+
+# glTF exporter formats handled by the pipeline and their file extensions
+GLTF_EXPORT_FORMATS = {
+    'GLTF_SEPARATE': '.gltf',
+    'GLB': '.glb',
+}
+GLTF_FILE_PATTERNS = ('*.gltf', '*.glb')
+
+# Pipeline files inside the target directory
+TEXTURE_STORE_DIR = '.texture_store'
+TEXTURE_RESIZE_CACHE_DIR = '.texture_cache'
+GLTF_SCAN_CACHE_FILE = '.gltf_scan_cache.json'
+
+def find_project_root(start):
+    """ First directory from `start` upwards holding a `.blender_project` marker, or None.
+    """
+    path = os.path.realpath(start)
+    while True:
+        if os.path.exists(os.path.join(path, PROJECT_MARKER)):
+            return path
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+
+def parse_excluded_dirs(text):
+    """ `'.godot, .git'` -> `['.godot', '.git']`
+    """
+    return [p.strip() for p in text.split(',') if p.strip()]
+
+class ProjectConfig:
+    """ Paths of one project, the plain Python counterpart of the add-on preferences.
+
+    `source_dir_rel` and `target_dir_rel` are relative to `root`. `prune` are
+    the folder names or patterns skipped when searching the project.
+    """
+
+    def __init__(self, root, source_dir_rel='', target_dir_rel='game', prune=file_walk.DEFAULT_PRUNE, use_texture_store=False):
+        self.root = Path(root)
+        self.source_dir_rel = source_dir_rel
+        self.target_dir_rel = target_dir_rel
+        self.prune = list(prune)
+        self.use_texture_store = use_texture_store
+
+    @classmethod
+    def find(cls, start, **kwargs):
+        """ Config of the project containing `start`, or None if it isn't inside one.
+        """
+        root = find_project_root(start)
+        if not root:
+            return None
+        return cls(root, **kwargs)
+
+    @property
+    def source_dir(self):
+        return self.root / self.source_dir_rel
+
+    @property
+    def target_dir(self):
+        return self.root / self.target_dir_rel
+
+    def index_path(self, index_type='asset_index'):
+        return self.target_dir / f'{index_type}.json'
+
+    def target_relpath(self, path):
+        """ Path relative to the target directory, as stored in the indexes.
+        """
+        return Path(path).relative_to(self.target_dir)
+
+    def output_path(self, blend_filepath, asset_name, export_format='GLTF_SEPARATE', parent_name=None, include_file_name=True):
+        """ Where a collection of `blend_filepath` is exported to.
+
+        The folder structure of the source directory is mirrored in the target
+        directory, with a folder per .blend file and optionally one for the
+        parent collection.
+        """
+        blend_filepath = Path(blend_filepath)
+        rel_path = blend_filepath.parent.relative_to(self.source_dir)
+        output_path = self.target_dir.joinpath(rel_path)
+        if include_file_name:
+            output_path = output_path.joinpath(blend_filepath.stem)
+        if parent_name:
+            output_path = output_path.joinpath(parent_name)
+        return output_path.joinpath(asset_name + GLTF_EXPORT_FORMATS[export_format])
+
+    def texture_store(self):
+        """ The `TextureStore` exported textures are linked from, None unless enabled.
+        """
+        if not self.use_texture_store:
+            return None
+        return textures.TextureStore(self.target_dir / TEXTURE_STORE_DIR)
+
+    def collect_texture_store_garbage(self):
+        """ Remove stored textures no exported file links to anymore, whether or not the store is enabled.
+        """
+        return textures.TextureStore(self.target_dir / TEXTURE_STORE_DIR).collect_garbage()
+
+    def resize_cache(self):
+        return textures.ResizeCache(self.target_dir / TEXTURE_RESIZE_CACHE_DIR)
+
+    def gltf_scan_cache_path(self):
+        return str(self.target_dir / GLTF_SCAN_CACHE_FILE)
+
+    def source_prune_paths(self):
+        # Exported files never include .blend sources, unless the sources live inside the target directory
+        source_dir = Path(os.path.realpath(self.source_dir))
+        target_dir = Path(os.path.realpath(self.target_dir))
+        if source_dir.is_relative_to(target_dir):
+            return ()
+        return (str(target_dir),)
+
+    def list_files(self, pattern, directory=None, prune_paths=(), cache=None):
+        """ Paths of the files matching `pattern` below `directory`, the project root by default.
+        """
+        return list(file_walk.iter_project_files(
+            directory or self.root,
+            pattern,
+            prune=self.prune,
+            prune_paths=prune_paths,
+            cache=cache,
+        ))
+
+def scan_gltf_files(config, scan_cache=None, dir_cache=None):
+    """ Summaries of all exported glTF files in the project, see `gltf_scan.summarize_gltf`.
+
+    Results are cached on disk in the target directory, so only files that
+    changed since the last scan are read again.
+    """
+    if scan_cache is None:
+        scan_cache = gltf_scan.GltfScanCache(config.gltf_scan_cache_path())
+    gltf_list = config.list_files(GLTF_FILE_PATTERNS, cache=dir_cache)
+    summaries = gltf_scan.scan_gltf_files(gltf_list, cache=scan_cache)
+    scan_cache.save()
+    return summaries
+
+def scan_project(config, scan_cache=None, dir_cache=None):
+    """ Read every exported file once and collect assets, materials and references, see `gltf_scan.ProjectScan`.
+    """
+    project_scan = gltf_scan.ProjectScan(scan_gltf_files(config, scan_cache, dir_cache))
+    for warning in project_scan.warnings:
+        print(warning)
+    return project_scan
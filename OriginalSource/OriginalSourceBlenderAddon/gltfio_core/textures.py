@@ -0,0 +1,251 @@
+# Moving exported texture files to their place in the target directory.
+import os
+import shutil
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# path -> (size, mtime_ns, digest)
+_DIGEST_CACHE = dict()
+
+def file_digest(path, chunk_size=2**20):
+    """ SHA-1 of a file, cached while its size and mtime are unchanged.
+    """
+    path = os.fspath(path)
+    stat = os.stat(path)
+    cached = _DIGEST_CACHE.get(path)
+    if cached and cached[:2] == (stat.st_size, stat.st_mtime_ns):
+        return cached[2]
+    digest = hashlib.sha1()
+    with open(path, 'rb') as file:
+        while chunk := file.read(chunk_size):
+            digest.update(chunk)
+    digest = digest.hexdigest()
+    _DIGEST_CACHE[path] = (stat.st_size, stat.st_mtime_ns, digest)
+    return digest
+
+def files_identical(path_a, path_b):
+    try:
+        if os.path.getsize(path_a) != os.path.getsize(path_b):
+            return False
+        return file_digest(path_a) == file_digest(path_b)
+    except OSError:
+        return False
+
+def same_filesystem(path, directory):
+    try:
+        return os.stat(path).st_dev == os.stat(directory).st_dev
+    except OSError:
+        return False
+
+def link_or_copy(source, target):
+    """ Hardlink `source` to `target`, replacing it, or copy it where hardlinks aren't supported.
+    """
+    target = os.fspath(target)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    tmp_path = f'{target}.{os.getpid()}.{threading.get_ident()}.link'
+    try:
+        os.link(source, tmp_path)
+    except OSError:
+        shutil.copy2(source, tmp_path)
+    os.replace(tmp_path, target)
+
+# Results of `relocate_file`
+MOVED = 'MOVED'
+UNCHANGED = 'UNCHANGED'
+FAILED = 'FAILED'
+
+def relocate_file(source, target):
+    """ Move `source` to `target`.
+
+    If `target` already holds the same content it is left untouched, which
+    keeps its mtime and avoids a reimport in Godot, and `source` is deleted.
+    """
+    source = os.fspath(source)
+    target = os.fspath(target)
+    if os.path.realpath(source) == os.path.realpath(target):
+        return UNCHANGED
+    try:
+        if os.path.isfile(target) and files_identical(source, target):
+            os.remove(source)
+            return UNCHANGED
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if same_filesystem(source, os.path.dirname(target)):
+            os.replace(source, target)
+        else:
+            shutil.copy2(source, target)
+            os.remove(source)
+    except OSError as err:
+        print("Error: % s" % err)
+        return FAILED
+    return MOVED
+
+class TextureStore:
+    """ Content addressed file store, with targets hardlinked to its objects.
+
+    Every object is stored once under its SHA-1. The hardlink count of an
+    object is its reference count, objects that no target links anymore are
+    removed by `collect_garbage`.
+    """
+
+    def __init__(self, root):
+        self.root = os.fspath(root)
+
+    def object_path(self, digest, suffix=''):
+        return os.path.join(self.root, digest[:2], digest + suffix.lower())
+
+    def add(self, source):
+        """ Move `source` into the store, or drop it if the content is stored already.
+
+        Objects are created with a hardlink, which never replaces an existing
+        object, so parallel exports adding the same content all end up with
+        the first one stored.
+        """
+        source = os.fspath(source)
+        path = self.object_path(file_digest(source), os.path.splitext(source)[1])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if same_filesystem(source, os.path.dirname(path)):
+            self._link(source, path)
+        else:
+            tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            shutil.copy2(source, tmp_path)
+            try:
+                self._link(tmp_path, path)
+            finally:
+                os.remove(tmp_path)
+        os.remove(source)
+        return path
+
+    def _link(self, source, path):
+        try:
+            os.link(source, path)
+        except FileExistsError:
+            pass
+
+    def relocate(self, source, target):
+        source = os.fspath(source)
+        target = os.fspath(target)
+        if os.path.realpath(source) == os.path.realpath(target):
+            return UNCHANGED
+        try:
+            path = self.object_path(file_digest(source), os.path.splitext(source)[1])
+            if os.path.isfile(target) and os.path.isfile(path) and os.path.samefile(path, target):
+                os.remove(source)
+                return UNCHANGED
+            if os.path.isfile(target) and not os.path.isfile(path) and files_identical(source, target):
+                # Adopt the existing target so it keeps its mtime
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                try:
+                    os.link(target, path)
+                except FileExistsError:
+                    # Stored by a parallel export in the meantime
+                    pass
+                else:
+                    os.remove(source)
+                    return UNCHANGED
+            link_or_copy(self.add(source), target)
+        except OSError as err:
+            print("Error: % s" % err)
+            return FAILED
+        return MOVED
+
+    def collect_garbage(self):
+        """ Remove objects that no target links anymore and return how many were removed.
+        """
+        removed = 0
+        if not os.path.isdir(self.root):
+            return removed
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    if os.stat(path).st_nlink > 1:
+                        continue
+                    os.remove(path)
+                    removed += 1
+                except OSError as err:
+                    print("Error: % s" % err)
+        return removed
+
+def relocate_files(moves, store=None, max_workers=None):
+    """ Relocate (source, target) pairs on a thread pool and return the result of each.
+
+    With a `TextureStore`, targets become hardlinks to the stored objects.
+    Source directories that end up empty are removed.
+    """
+    if not moves:
+        return []
+    if max_workers is None:
+        max_workers = min(8, len(moves))
+    relocate = store.relocate if store else relocate_file
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(lambda move: relocate(*move), moves))
+
+    for directory in {os.path.dirname(os.fspath(source)) for source, target in moves}:
+        try:
+            os.rmdir(directory)
+        except OSError:
+            pass
+    return results
+
+def fit_size(width, height, max_size=0, power_of_two=False):
+    """ Image size with the longest side limited to `max_size`, keeping the aspect ratio.
+
+    With `power_of_two`, both sides are rounded down to a power of two.
+    """
+    longest = max(width, height)
+    if max_size and longest > max_size:
+        width = max(1, round(width * max_size / longest))
+        height = max(1, round(height * max_size / longest))
+    if power_of_two:
+        width = 1 << (max(1, width).bit_length() - 1)
+        height = 1 << (max(1, height).bit_length() - 1)
+    return width, height
+
+def resize_settings_key(max_size=0, power_of_two=False):
+    """ Short name for the resize settings, used in cache and output file names. Empty if resizing is off.
+    """
+    parts = []
+    if max_size:
+        parts.append(f'{max_size}px')
+    if power_of_two:
+        parts.append('pot')
+    return '-'.join(parts)
+
+def resized_variant_path(path, settings_key):
+    """ `textures/wood.png` -> `textures/wood.512px.png`
+    """
+    path = os.fspath(path)
+    stem, suffix = os.path.splitext(path)
+    return f'{stem}.{settings_key}{suffix}'
+
+class ResizeCache:
+    """ Resized images, keyed by the digest of the source image and the resize settings.
+
+    A source that doesn't need resizing is recorded with an empty marker file,
+    so it isn't loaded again either.
+    """
+
+    def __init__(self, root):
+        self.root = os.fspath(root)
+
+    def path(self, digest, settings_key, suffix=''):
+        return os.path.join(self.root, digest[:2], f'{digest}-{settings_key}{suffix.lower()}')
+
+    def unchanged_marker(self, digest, settings_key):
+        return self.path(digest, settings_key, '.unchanged')
+
+    def lookup(self, digest, settings_key, suffix=''):
+        """ (hit, path): the cached resized image, or None if the source is kept as is.
+        """
+        path = self.path(digest, settings_key, suffix)
+        if os.path.isfile(path):
+            return True, path
+        if os.path.isfile(self.unchanged_marker(digest, settings_key)):
+            return True, None
+        return False, None
+
+    def mark_unchanged(self, digest, settings_key):
+        marker = self.unchanged_marker(digest, settings_key)
+        os.makedirs(os.path.dirname(marker), exist_ok=True)
+        open(marker, 'w').close()
@@ -1,6 +1,8 @@
 @tool
 extends EditorPlugin
 
+const GltfJson = preload('gltf_json.gd')
+
 var DEBUG = 0
 
 var reimport_flag = false
@@ -48,7 +50,7 @@ func reimport_recursive(dir: EditorFileSystemDirectory) -> void:
 	var path = dir.get_path()
 	for i in range(dir.get_file_count()):
 		var file_name = dir.get_file(i)
-		if file_name.get_extension() != 'gltf':
+		if not GltfJson.is_gltf_file(file_name):
 			continue
 		var file_path = path+file_name
 		if FileAccess.file_exists(file_path+'.reimport'):
@@ -68,7 +70,7 @@ func _on_resources_reimporting(paths):
 	
 	var filesystem = EditorInterface.get_resource_filesystem()
 	for path in paths:
-		if not path.get_extension() == 'gltf':
+		if not GltfJson.is_gltf_file(path):
 			continue
 		if not ResourceLoader.exists(path):
 			var file = FileAccess.open(path+'.reimport', FileAccess.WRITE)
@@ -176,13 +178,13 @@ func _on_resources_reimported(paths):
 		print('REIMPORTED '+str(paths))
 	var filesystem = EditorInterface.get_resource_filesystem()
 	for path in paths:
-		if not path.get_extension() == 'gltf':
+		if not GltfJson.is_gltf_file(path):
 			continue
 
 func import_preparation(gltf_path: String) -> void:
 	var asset_type = null
 	
-	var json = JSON.parse_string(FileAccess.open(gltf_path, FileAccess.READ).get_as_text())
+	var json = GltfJson.read(gltf_path)
 	if 'extras' in json['scenes'][0].keys():
 		var extras = json['scenes'][0]['extras']
 		if 'asset_type' in extras.keys():
@@ -199,7 +201,7 @@ func import_preparation(gltf_path: String) -> void:
 func import_config_setup(gltf_path, asset_type = null) -> void:
 	
 	var import_config_path = gltf_path+'.import'
-	var gltf = JSON.parse_string(FileAccess.open(gltf_path, FileAccess.READ).get_as_text())
+	var gltf = GltfJson.read(gltf_path)
 	var asset_index = JSON.parse_string(FileAccess.open('res://asset_index.json', FileAccess.READ).get_as_text())['assets']
 	
 	var import_config = ConfigFile.new()
@@ -1,6 +1,8 @@
 @tool # Needed so it runs in editor.
 extends EditorScenePostImport
 
+const GltfJson = preload('gltf_json.gd')
+
 var DEBUG = 0
 
 func _post_import(scene: Node) -> Object:
@@ -19,7 +21,7 @@ func _post_import(scene: Node) -> Object:
 	var asset_type = null
 	
 	# TODO replace json parsing by integrate meta lookup
-	var json = JSON.parse_string(FileAccess.open(gltf_path, FileAccess.READ).get_as_text())
+	var json = GltfJson.read(gltf_path)
 	if 'extras' in json['scenes'][0].keys():
 		var extras = json['scenes'][0]['extras']
 		if 'asset_type' in extras.keys():
@@ -0,0 +1,30 @@
+@tool
+extends RefCounted
+
+# Reads the glTF JSON of exported .gltf and binary .glb files.
+
+const GLB_MAGIC = 0x46546C67 # 'glTF'
+const CHUNK_JSON = 0x4E4F534A # 'JSON'
+
+static func is_gltf_file(path: String) -> bool:
+	return path.get_extension() in ['gltf', 'glb']
+
+static func read(path: String) -> Variant:
+	var file = FileAccess.open(path, FileAccess.READ)
+	if not file:
+		push_error("Could not open '"+path+"'")
+		return null
+	if path.get_extension() != 'glb':
+		return JSON.parse_string(file.get_as_text())
+
+	# Only the JSON chunk is read, the binary chunk is skipped
+	if file.get_32() != GLB_MAGIC:
+		push_error("Not a GLB file '"+path+"'")
+		return null
+	file.get_32() # version
+	file.get_32() # total length
+	var chunk_length = file.get_32()
+	if file.get_32() != CHUNK_JSON:
+		push_error("Missing JSON chunk in '"+path+"'")
+		return null
+	return JSON.parse_string(file.get_buffer(chunk_length).get_string_from_utf8())
@@ -1,6 +1,8 @@
 @tool
 extends EditorScenePostImportPlugin
 
+const GltfJson = preload('gltf_json.gd')
+
 var DEBUG = 0
 var MATERIALS : Dictionary = {}
 
@@ -93,7 +95,7 @@ func _post_process(scene: Node) -> void:
 	
 	var asset_type = null
 	
-	var gltf = JSON.parse_string(FileAccess.open(gltf_path, FileAccess.READ).get_as_text())
+	var gltf = GltfJson.read(gltf_path)
 	if 'extras' in gltf['scenes'][0].keys():
 		var extras = gltf['scenes'][0]['extras']
 		if 'asset_type' in extras.keys():
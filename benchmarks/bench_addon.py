@@ -0,0 +1,29 @@
+# Helpers for the benchmark scripts that run inside Blender.
+import sys
+import addon_utils
+import bpy
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+ADDON_PARENT_DIR = REPO_DIR / 'OriginalSource'
+ADDON_MODULE = 'OriginalSourceBlenderAddon'
+
+# Printed in front of the JSON results, so the runner can find them in the Blender output
+RESULT_PREFIX = 'GLTFIO_BENCHMARK_RESULT '
+
+def script_args():
+    return sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else []
+
+def enable_addon(project_dir, source_dir_rel='', target_dir_rel='game'):
+    """ Enable the add-on from this checkout and point it at the benchmark project.
+    """
+    if str(ADDON_PARENT_DIR) not in sys.path:
+        sys.path.insert(0, str(ADDON_PARENT_DIR))
+    module = addon_utils.enable(ADDON_MODULE, default_set=True, handle_error=None)
+    if not module:
+        raise RuntimeError(f"Could not enable the add-on from {ADDON_PARENT_DIR / ADDON_MODULE}")
+    prefs = bpy.context.preferences.addons[ADDON_MODULE].preferences
+    prefs.project_dir = str(project_dir)
+    prefs.source_dir_rel = source_dir_rel
+    prefs.target_dir_rel = target_dir_rel
+    return module
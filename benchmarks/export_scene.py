@@ -0,0 +1,66 @@
+# Export a generated benchmark project through the add-on. Runs inside Blender:
+#
+#   blender --background --factory-startup blender/scene.blend --python benchmarks/export_scene.py -- \
+#       --project /tmp/bench --mode operator
+#
+# `operator` runs GLTFIO_OT_export with the ALL context, `script` runs the
+# export of export_all.py used by batch exports. The export time, without
+# Blender startup and file loading, is printed as JSON.
+import os
+import sys
+import json
+import time
+import argparse
+import importlib.util
+import bpy
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import bench_addon
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Export a benchmark project')
+    parser.add_argument('--project', required=True)
+    parser.add_argument('--mode', choices=['operator', 'script'], default='operator')
+    parser.add_argument('--format', choices=['GLTF_SEPARATE', 'GLB'], default=None,
+                        help='Re-initialize the exporters with this format before exporting')
+    return parser.parse_args(bench_addon.script_args())
+
+def load_export_all():
+    path = bench_addon.ADDON_PARENT_DIR / bench_addon.ADDON_MODULE / 'export_all.py'
+    spec = importlib.util.spec_from_file_location('gltfio_export_all', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def reinit_exporters(export_format):
+    bpy.context.preferences.addons[bench_addon.ADDON_MODULE].preferences.export_format = export_format
+    for col in bpy.data.collections:
+        if not col.exporters:
+            continue
+        with bpy.context.temp_override(collection=col):
+            bpy.ops.gltfio.initialize_export_collection()
+
+def main():
+    args = parse_args()
+    bench_addon.enable_addon(args.project)
+    if args.format:
+        reinit_exporters(args.format)
+
+    start = time.perf_counter()
+    if args.mode == 'operator':
+        if not bpy.ops.gltfio.export.poll():
+            raise RuntimeError('gltfio.export can not run in this context')
+        bpy.ops.gltfio.export(export_context='ALL')
+    else:
+        load_export_all().export_file(force=True)
+    export_time = time.perf_counter() - start
+
+    result = {
+        'export_time': export_time,
+        'objects': len(bpy.data.objects),
+        'collections': len([col for col in bpy.data.collections if col.exporters]),
+    }
+    print(bench_addon.RESULT_PREFIX + json.dumps(result))
+
+if __name__ == '__main__':
+    main()
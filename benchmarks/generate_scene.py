@@ -0,0 +1,181 @@
+# Generate a synthetic benchmark project. Runs inside Blender:
+#
+#   blender --background --factory-startup --python benchmarks/generate_scene.py -- \
+#       --project /tmp/bench --collections 12 --objects 50 --materials 8 --texture-size 1024
+#
+# Creates a `.blender_project` root with the .blend file in `blender/`, its
+# textures in `textures/`, the pipeline node groups in `assets/nodes/` and an
+# empty `game/` target directory.
+import os
+import sys
+import random
+import argparse
+import bmesh
+import bpy
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import bench_addon
+
+COLLECTION_PREFIXES = ('LI', 'PR', 'SE')
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Generate a synthetic benchmark project')
+    parser.add_argument('--project', required=True, help='Project directory to create')
+    parser.add_argument('--name', default='scene', help='Name of the generated .blend file')
+    parser.add_argument('--collections', type=int, default=12, help='Number of exported collections, cycling LI-/PR-/SE-')
+    parser.add_argument('--objects', type=int, default=50, help='Mesh objects per collection')
+    parser.add_argument('--shared-meshes', type=float, default=0.5, help='Fraction of objects reusing another object\'s mesh')
+    parser.add_argument('--materials', type=int, default=8, help='Number of materials')
+    parser.add_argument('--texture-size', type=int, default=1024, help='Size of the image texture of each material, 0 for none')
+    parser.add_argument('--instances', type=int, default=10, help='Collection instances per SE- collection')
+    parser.add_argument('--collisions', type=int, default=2, help='COL- collision objects per collection')
+    parser.add_argument('--vertex-colors', type=float, default=0.5, help='Fraction of meshes with a color attribute')
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args(bench_addon.script_args())
+
+def clear_scene():
+    for ob in list(bpy.data.objects):
+        bpy.data.objects.remove(ob)
+    for mesh in list(bpy.data.meshes):
+        bpy.data.meshes.remove(mesh)
+
+def write_pipeline_node_groups(path):
+    """ Stand-in for the project's `pipeline.blend`, with a pass-through vertex color node group.
+    """
+    ng = bpy.data.node_groups.new('GLTFIO-write_vertex_color', 'GeometryNodeTree')
+    ng.interface.new_socket('Geometry', in_out='INPUT', socket_type='NodeSocketGeometry')
+    ng.interface.new_socket('Geometry', in_out='OUTPUT', socket_type='NodeSocketGeometry')
+    n_in = ng.nodes.new('NodeGroupInput')
+    n_out = ng.nodes.new('NodeGroupOutput')
+    ng.links.new(n_in.outputs[0], n_out.inputs[0])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    bpy.data.libraries.write(str(path), {ng}, fake_user=True)
+    bpy.data.node_groups.remove(ng)
+
+def create_texture(path, size, rng):
+    image = bpy.data.images.new(path.stem, size, size)
+    color = [rng.random(), rng.random(), rng.random(), 1.]
+    image.generated_color = color
+    image.filepath_raw = str(path)
+    image.file_format = 'PNG'
+    image.save()
+    image.source = 'FILE'
+    image.filepath = bpy.path.relpath(str(path))
+    return image
+
+def create_materials(count, texture_dir, texture_size, rng):
+    materials = []
+    for i in range(count):
+        mat = bpy.data.materials.new(f'MA-bench_{i:03}')
+        mat.use_nodes = True
+        if texture_size:
+            image = create_texture(texture_dir / f'bench_{i:03}.png', texture_size, rng)
+            n_tex = mat.node_tree.nodes.new('ShaderNodeTexImage')
+            n_tex.image = image
+            n_bsdf = mat.node_tree.nodes['Principled BSDF']
+            mat.node_tree.links.new(n_tex.outputs['Color'], n_bsdf.inputs['Base Color'])
+        materials.append(mat)
+    return materials
+
+def create_mesh(name, rng, vertex_colors):
+    mesh = bpy.data.meshes.new(name)
+    bm = bmesh.new()
+    if rng.random() < .5:
+        bmesh.ops.create_uvsphere(bm, u_segments=24, v_segments=12, radius=.5, calc_uvs=True)
+    else:
+        bmesh.ops.create_cube(bm, size=1., calc_uvs=True)
+    bm.to_mesh(mesh)
+    bm.free()
+    if vertex_colors:
+        attribute = mesh.color_attributes.new('Color', 'BYTE_COLOR', 'CORNER')
+        color = (rng.random(), rng.random(), rng.random(), 1.)
+        for value in attribute.data:
+            value.color = color
+    return mesh
+
+def create_collection(name, parent):
+    col = bpy.data.collections.new(name)
+    parent.children.link(col)
+    return col
+
+def populate_collection(col, args, materials, rng):
+    meshes = []
+    for i in range(args.objects):
+        if meshes and rng.random() < args.shared_meshes:
+            mesh = rng.choice(meshes)
+        else:
+            mesh = create_mesh(f'{col.name}-mesh_{i:03}', rng, rng.random() < args.vertex_colors)
+            if materials:
+                mesh.materials.append(rng.choice(materials))
+            meshes.append(mesh)
+        ob = bpy.data.objects.new(f'{col.name}-ob_{i:03}', mesh)
+        ob.location = (rng.uniform(-20, 20), rng.uniform(-20, 20), 0.)
+        col.objects.link(ob)
+    for i in range(args.collisions):
+        mesh = create_mesh(f'COL-{col.name}_{i:02}', rng, False)
+        ob = bpy.data.objects.new(f'COL-{col.name}_{i:02}', mesh)
+        ob.display_type = 'WIRE'
+        col.objects.link(ob)
+
+def add_instances(col, targets, count, rng):
+    for i in range(count):
+        target = rng.choice(targets)
+        ob = bpy.data.objects.new(f'{col.name}-instance_{i:03}', None)
+        ob.instance_type = 'COLLECTION'
+        ob.instance_collection = target
+        ob.location = (rng.uniform(-50, 50), rng.uniform(-50, 50), 0.)
+        col.objects.link(ob)
+
+def init_exporter(col, asset_name):
+    with bpy.context.temp_override(collection=col):
+        bpy.ops.collection.exporter_add(name='IO_FH_gltf2')
+    props = col.gltfIOGodotAssetProperties
+    props.export_type = 'ASSET'
+    props.asset_name = asset_name
+    props.append_parent_collection = False
+    with bpy.context.temp_override(collection=col):
+        bpy.ops.gltfio.initialize_export_collection()
+
+def main():
+    args = parse_args()
+    rng = random.Random(args.seed)
+
+    project_dir = Path(args.project).resolve()
+    (project_dir / '.blender_project').mkdir(parents=True, exist_ok=True)
+    (project_dir / 'game').mkdir(exist_ok=True)
+    blend_path = project_dir / 'blender' / f'{args.name}.blend'
+    blend_path.parent.mkdir(parents=True, exist_ok=True)
+
+    bench_addon.enable_addon(project_dir)
+    write_pipeline_node_groups(project_dir / 'assets' / 'nodes' / 'pipeline.blend')
+
+    clear_scene()
+    # Relative paths and the export paths depend on the file location
+    bpy.ops.wm.save_as_mainfile(filepath=str(blend_path))
+
+    materials = create_materials(args.materials, project_dir / 'textures', args.texture_size, rng)
+
+    scene_col = bpy.context.scene.collection
+    collections = []
+    for i in range(args.collections):
+        prefix = COLLECTION_PREFIXES[i % len(COLLECTION_PREFIXES)]
+        col = create_collection(f'{prefix}-bench_{i:03}', scene_col)
+        populate_collection(col, args, materials, rng)
+        collections.append(col)
+
+    for col in collections:
+        init_exporter(col, col.name.split('-', 1)[1])
+
+    # Instanced collections need their asset ID, which initializing the exporter assigns
+    instance_targets = [col for col in collections if not col.name.startswith('SE-')]
+    if instance_targets:
+        for col in collections:
+            if col.name.startswith('SE-'):
+                add_instances(col, instance_targets, args.instances, rng)
+
+    bpy.ops.wm.save_mainfile()
+    print(f"Generated {blend_path} with {len(collections)} collections and {len(bpy.data.objects)} objects")
+
+if __name__ == '__main__':
+    main()
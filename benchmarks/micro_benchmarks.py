@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+""" Micro benchmarks of the file-side hot paths in gltfio_core, run with plain Python.
+
+Covers loading, merging and writing the index JSON, walking the project
+tree, scanning exported glTF files and relocating their image textures, on
+synthetic data generated in a temporary directory:
+
+    python benchmarks/micro_benchmarks.py
+    python benchmarks/micro_benchmarks.py --quick --filter index
+    python benchmarks/micro_benchmarks.py --save benchmarks/results/micro_baseline.json
+    python benchmarks/micro_benchmarks.py --compare benchmarks/results/micro_baseline.json
+
+Every benchmark runs a number of rounds and records the min, median and
+mean time. With `--compare`, the median of each benchmark is checked
+against the baseline and the run fails if any got slower by more than
+`--threshold`. Timings are only comparable on the same machine, so the
+baseline is recorded locally, e.g. on the commit before a change, and
+baselines from another machine, Python or `--quick` setting are skipped.
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import base64
+import platform
+import argparse
+import statistics
+import tempfile
+from pathlib import Path
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCHMARK_DIR.parent / 'OriginalSource' / 'OriginalSourceBlenderAddon'))
+
+from gltfio_core import asset_index, file_walk, gltf_scan, post_process, project
+
+BENCHMARKS = []
+
+def benchmark(name, params, quick_params=None):
+    """ Register a benchmark function, run once per parameter.
+    """
+    def register(func):
+        BENCHMARKS.append((name, func, params, quick_params or params[:1]))
+        return func
+    return register
+
+class Bench:
+    """ Times a function over a number of rounds, calling `setup` untimed before each.
+    """
+
+    def __init__(self, rounds, min_time):
+        self.rounds = rounds
+        self.min_time = min_time
+        self.times = []
+
+    def __call__(self, func, setup=None):
+        total = 0.
+        while len(self.times) < self.rounds or total < self.min_time:
+            if setup:
+                setup()
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+            self.times.append(elapsed)
+            total += elapsed
+            if len(self.times) >= 10 * self.rounds:
+                break
+
+    def stats(self):
+        return {
+            'min': min(self.times),
+            'median': statistics.median(self.times),
+            'mean': statistics.fmean(self.times),
+            'rounds': len(self.times),
+        }
+
+def random_id(rng):
+    return '%016x' % rng.getrandbits(64)
+
+def make_project(root):
+    root = Path(root)
+    (root / project.PROJECT_MARKER).mkdir(parents=True, exist_ok=True)
+    (root / 'game').mkdir(exist_ok=True)
+    return project.ProjectConfig(root)
+
+def write_index(config, count, rng, index_type='asset_index'):
+    assets = {
+        random_id(rng): {'name': f'asset_{i:06}', 'filepath': f'props/file_{i // 10:05}/asset_{i:06}.gltf'}
+        for i in range(count)
+    }
+    with open(config.index_path(index_type), 'w') as file:
+        json.dump({'assets': assets}, file, indent=4)
+    return assets
+
+@benchmark('index_load', [1000, 10000, 100000], [1000, 10000])
+def bench_index_load(bench, tmp_dir, count):
+    config = make_project(tmp_dir)
+    write_index(config, count, random.Random(0))
+    bench(lambda: asset_index.AssetIndexManager(config).assets('asset_index'))
+
+@benchmark('index_merge', [1000, 10000, 100000], [1000, 10000])
+def bench_index_merge(bench, tmp_dir, count):
+    """ One export adding a few entries, merged on top of the index on disk.
+    """
+    config = make_project(tmp_dir)
+    rng = random.Random(0)
+    write_index(config, count, rng)
+    updates = {random_id(rng): {'name': f'new_{i}', 'filepath': f'new/new_{i}.gltf'} for i in range(10)}
+
+    def merge():
+        manager = asset_index.AssetIndexManager(config)
+        manager.update(updates)
+        manager.flush()
+    bench(merge)
+
+@benchmark('index_write', [1000, 10000, 100000], [1000, 10000])
+def bench_index_write(bench, tmp_dir, count):
+    """ Overwriting the whole index, as the cleanup does.
+    """
+    config = make_project(tmp_dir)
+    assets = write_index(config, count, random.Random(0))
+    manager = asset_index.AssetIndexManager(config)
+
+    def write():
+        manager.update(assets, overwrite=True)
+        manager.flush()
+    bench(write)
+
+def make_tree(root, file_count, files_per_dir=50, dirs_per_dir=8):
+    """ Directory tree with `file_count` empty files, a few of them .gltf and .blend.
+    """
+    suffixes = ['.png'] * 6 + ['.bin', '.gltf', '.blend', '.import']
+    dirs = [Path(root)]
+    created = 0
+    n = 0
+    while created < file_count:
+        directory = dirs[n]
+        n += 1
+        directory.mkdir(parents=True, exist_ok=True)
+        for i in range(min(files_per_dir, file_count - created)):
+            (directory / f'file_{i:03}{suffixes[(created + i) % len(suffixes)]}').touch()
+        created += min(files_per_dir, file_count - created)
+        dirs += [directory / f'dir_{i}' for i in range(dirs_per_dir)]
+    (Path(root) / '.godot' / 'imported').mkdir(parents=True, exist_ok=True)
+
+@benchmark('list_files_cold', [10000, 100000], [10000])
+def bench_list_files_cold(bench, tmp_dir, count):
+    config = make_project(tmp_dir)
+    make_tree(config.root / 'game', count)
+    bench(lambda: config.list_files(project.GLTF_FILE_PATTERNS))
+
+@benchmark('list_files_cached', [10000, 100000], [10000])
+def bench_list_files_cached(bench, tmp_dir, count):
+    """ Repeated searches of an unchanged tree, reusing the directory listings.
+    """
+    config = make_project(tmp_dir)
+    make_tree(config.root / 'game', count)
+    cache = file_walk.DirectoryCache()
+    bench(lambda: config.list_files('*.blend', cache=cache))
+
+def make_gltf(rng, asset_id, material_ids, instance_ids, buffer_size, image_count=0):
+    """ glTF JSON like the exporter writes, with the pipeline extras and an embedded buffer.
+    """
+    buffer = base64.b64encode(rng.randbytes(buffer_size)).decode()
+    return {
+        'asset': {'generator': 'benchmark', 'version': '2.0'},
+        'scene': 0,
+        'scenes': [{'name': 'Scene', 'nodes': [0], 'extras': {'asset_type': 'ASSET', 'asset_id': asset_id}}],
+        'nodes': [{'name': 'root', 'extras': {'instance_asset_id': i}} for i in instance_ids],
+        'materials': [{'name': f'MA-{i}', 'extras': {'asset_id': i}} for i in material_ids],
+        'images': [
+            {'name': f'image_{i}', 'uri': f'textures/image_{i}.png', 'extras': {'source_path': f'textures/{asset_id}_{i}.png'}}
+            for i in range(image_count)
+        ],
+        'buffers': [{'byteLength': buffer_size, 'uri': 'data:application/octet-stream;base64,' + buffer}],
+    }
+
+def make_gltf_files(target_dir, count, rng, buffer_size=64 * 1024, image_count=0):
+    material_ids = [random_id(rng) for i in range(max(2, count // 10))]
+    asset_ids = [random_id(rng) for i in range(count)]
+    paths = []
+    for n, asset_id in enumerate(asset_ids):
+        path = Path(target_dir) / f'dir_{n // 50:03}' / f'asset_{n:05}' / f'asset_{n:05}.gltf'
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = make_gltf(rng, asset_id, rng.sample(material_ids, 2), rng.sample(asset_ids, min(3, count)), buffer_size, image_count)
+        with open(path, 'w') as file:
+            json.dump(data, file, indent=4)
+        paths.append(path)
+    return paths
+
+@benchmark('gltf_scan_cold', [100, 1000], [100])
+def bench_gltf_scan_cold(bench, tmp_dir, count):
+    """ The cleanup operators' scan without a scan cache, reading every file.
+    """
+    config = make_project(tmp_dir)
+    make_gltf_files(config.target_dir, count, random.Random(0))
+    bench(lambda: gltf_scan.ProjectScan(project.scan_gltf_files(config, scan_cache=gltf_scan.GltfScanCache())))
+
+@benchmark('gltf_scan_cached', [100, 1000], [100])
+def bench_gltf_scan_cached(bench, tmp_dir, count):
+    """ Repeated scans with nothing changed, served from the scan cache.
+    """
+    config = make_project(tmp_dir)
+    make_gltf_files(config.target_dir, count, random.Random(0))
+    cache = gltf_scan.GltfScanCache()
+    project.scan_gltf_files(config, scan_cache=cache)
+    bench(lambda: gltf_scan.ProjectScan(project.scan_gltf_files(config, scan_cache=cache)))
+
+def bench_relocation(bench, tmp_dir, count, use_texture_store):
+    config = make_project(tmp_dir)
+    config.use_texture_store = use_texture_store
+    rng = random.Random(0)
+    originals = Path(tmp_dir) / 'originals'
+    gltf_paths = make_gltf_files(originals, count, rng, buffer_size=1024, image_count=4)
+    for path in gltf_paths:
+        (path.parent / 'textures').mkdir()
+        for i in range(4):
+            (path.parent / 'textures' / f'image_{i}.png').write_bytes(rng.randbytes(256 * 1024))
+    exported = config.target_dir / 'exported'
+
+    def setup():
+        # Fresh exported files every round, the textures already at their targets from the previous round
+        shutil.rmtree(exported, ignore_errors=True)
+        shutil.copytree(originals, exported)
+
+    def relocate():
+        for path in gltf_paths:
+            post_process.relocate_image_textures(config, exported / path.relative_to(originals))
+    bench(relocate, setup=setup)
+
+@benchmark('texture_relocation', [10, 100], [10])
+def bench_texture_relocation(bench, tmp_dir, count):
+    bench_relocation(bench, tmp_dir, count, False)
+
+@benchmark('texture_relocation_store', [10, 100], [10])
+def bench_texture_relocation_store(bench, tmp_dir, count):
+    bench_relocation(bench, tmp_dir, count, True)
+
+def run(args):
+    results = {
+        'python': platform.python_version(),
+        'machine': f'{platform.node()} {platform.system()} {platform.machine()} {platform.processor()} {os.cpu_count()} CPUs',
+        'quick': args.quick,
+        'benchmarks': dict(),
+    }
+    for name, func, params, quick_params in BENCHMARKS:
+        if args.filter and not any(f in name for f in args.filter):
+            continue
+        for param in quick_params if args.quick else params:
+            key = f'{name}[{param}]'
+            bench = Bench(args.rounds, args.min_time)
+            with tempfile.TemporaryDirectory(prefix='gltfio-micro-') as tmp_dir:
+                # The benchmarked code prints per file, which would dominate the timings
+                with open(os.devnull, 'w') as devnull:
+                    stdout = sys.stdout
+                    sys.stdout = devnull
+                    try:
+                        func(bench, tmp_dir, param)
+                    finally:
+                        sys.stdout = stdout
+            stats = bench.stats()
+            results['benchmarks'][key] = stats
+            print(f"{key:36} min {stats['min'] * 1000:9.2f}ms  median {stats['median'] * 1000:9.2f}ms  "
+                  f"mean {stats['mean'] * 1000:9.2f}ms  rounds {stats['rounds']}")
+    return results
+
+def compare(baseline, results, threshold):
+    """ Print the change of each benchmark's median against the baseline. Returns False if any regressed.
+    """
+    for key in ('machine', 'python', 'quick'):
+        if baseline.get(key) != results[key]:
+            print(f"Not comparing against a baseline with a different {key} `{baseline.get(key)}`, "
+                  f"record one with --save on this machine first")
+            return True
+    ok = True
+    for key, stats in results['benchmarks'].items():
+        before = baseline['benchmarks'].get(key)
+        if not before:
+            print(f'{key:36} no baseline')
+            continue
+        change = (stats['median'] - before['median']) / before['median']
+        flag = ''
+        if change > threshold:
+            flag = ' REGRESSION'
+            ok = False
+        print(f"{key:36} {before['median'] * 1000:9.2f}ms -> {stats['median'] * 1000:9.2f}ms ({change:+.1%}){flag}")
+    return ok
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--quick', action='store_true', help='Only the smallest sizes, for CI')
+    parser.add_argument('--filter', nargs='*', help='Only run benchmarks whose name contains one of these')
+    parser.add_argument('--rounds', type=int, default=5, help='Minimum rounds per benchmark')
+    parser.add_argument('--min-time', type=float, default=.2, help='Minimum total seconds per benchmark, up to 10x the rounds')
+    parser.add_argument('--save', help='Write the results to this JSON file')
+    parser.add_argument('--compare', help='Baseline JSON to compare against, exits with 1 on a regression')
+    parser.add_argument('--threshold', type=float, default=.2, help='Relative slowdown of the median reported as a regression')
+    args = parser.parse_args()
+
+    results = run(args)
+    if args.save:
+        Path(args.save).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.save, 'w') as file:
+            json.dump(results, file, indent=4)
+        print(f'Wrote {args.save}')
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        if not compare(baseline, results, args.threshold):
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
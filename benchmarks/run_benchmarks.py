@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+""" End-to-end export benchmarks of the Blender add-on.
+
+Generates the synthetic projects from `scenarios.json` with Blender in
+background mode, exports them through the add-on and records the wall time,
+peak RSS and output size of every scenario:
+
+    python benchmarks/run_benchmarks.py --blender /path/to/blender
+    python benchmarks/run_benchmarks.py --scenarios small medium --repeat 3
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/<old>.json benchmarks/results/<new>.json
+
+Results are written to `benchmarks/results/<commit>.json` with the commit,
+Blender version and machine they were measured on.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import statistics
+import subprocess
+import tempfile
+import threading
+from pathlib import Path
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+REPO_DIR = BENCHMARK_DIR.parent
+RESULTS_DIR = BENCHMARK_DIR / 'results'
+RESULT_PREFIX = 'GLTFIO_BENCHMARK_RESULT '
+
+def git_commit():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=REPO_DIR,
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+    return commit + ('-dirty' if dirty else '')
+
+def blender_version(blender):
+    output = subprocess.run([blender, '--version'], capture_output=True, text=True).stdout
+    return output.splitlines()[0].strip() if output else 'unknown'
+
+def run_process(args):
+    """ Run a process to completion, returning its wall time, peak RSS in bytes (None if unknown) and output.
+    """
+    start = time.perf_counter()
+    process = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    peak_rss = None
+    if hasattr(os, 'wait4'):
+        # Read the output on a separate thread, wait4 gives the resource usage of just this child
+        lines = []
+        reader = threading.Thread(target=lambda: lines.extend(process.stdout))
+        reader.start()
+        pid, status, usage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+        reader.join()
+        output = ''.join(lines)
+        # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+        peak_rss = usage.ru_maxrss if sys.platform == 'darwin' else usage.ru_maxrss * 1024
+    else:
+        output, _ = process.communicate()
+    wall_time = time.perf_counter() - start
+    return process.returncode, wall_time, peak_rss, output
+
+def parse_result(output):
+    for line in output.splitlines():
+        if line.startswith(RESULT_PREFIX):
+            return json.loads(line[len(RESULT_PREFIX):])
+    return None
+
+def output_size(target_dir):
+    """ Total size and count of the exported files, not counting hidden cache directories.
+    """
+    size = 0
+    count = 0
+    for dirpath, dirnames, filenames in os.walk(target_dir):
+        dirnames[:] = [d for d in dirnames if not d.startswith('.')]
+        for name in filenames:
+            size += os.path.getsize(os.path.join(dirpath, name))
+            count += 1
+    return size, count
+
+def generate_project(blender, project_dir, settings, seed):
+    args = [
+        blender, '--background', '--factory-startup',
+        '--python', str(BENCHMARK_DIR / 'generate_scene.py'), '--',
+        '--project', str(project_dir), '--seed', str(seed),
+    ]
+    for key, value in settings.items():
+        args += [f'--{key.replace("_", "-")}', str(value)]
+    returncode, wall_time, peak_rss, output = run_process(args)
+    if returncode != 0:
+        raise RuntimeError(f'Generating the project failed:\n{output}')
+    return project_dir / 'blender' / 'scene.blend'
+
+def export_project(blender, project_dir, blend_path, mode, export_format):
+    target_dir = project_dir / 'game'
+    # Every run starts from an empty target directory
+    shutil.rmtree(target_dir, ignore_errors=True)
+    target_dir.mkdir()
+    args = [
+        blender, '--background', '--factory-startup', str(blend_path),
+        '--python', str(BENCHMARK_DIR / 'export_scene.py'), '--',
+        '--project', str(project_dir), '--mode', mode,
+    ]
+    if export_format:
+        args += ['--format', export_format]
+    returncode, wall_time, peak_rss, output = run_process(args)
+    result = parse_result(output)
+    if returncode != 0 or result is None:
+        raise RuntimeError(f'Export failed:\n{output}')
+    size, count = output_size(target_dir)
+    return {
+        'wall_time': wall_time,
+        'export_time': result['export_time'],
+        'peak_rss': peak_rss,
+        'output_size': size,
+        'output_files': count,
+    }
+
+def run_scenario(blender, name, settings, args):
+    with tempfile.TemporaryDirectory(prefix=f'gltfio-bench-{name}-') as tmp_dir:
+        project_dir = Path(tmp_dir)
+        blend_path = generate_project(blender, project_dir, settings, args.seed)
+        runs = [
+            export_project(blender, project_dir, blend_path, args.mode, args.format)
+            for i in range(args.repeat)
+        ]
+    result = {
+        'settings': settings,
+        'runs': runs,
+    }
+    # The median of every metric over the runs is what gets compared
+    for key in runs[0]:
+        values = [run[key] for run in runs if run[key] is not None]
+        result[key] = statistics.median(values) if values else None
+    return result
+
+def format_bytes(size):
+    if size is None:
+        return '-'
+    for unit in ('B', 'KB', 'MB'):
+        if abs(size) < 1024:
+            return f'{size:.0f}{unit}'
+        size /= 1024
+    return f'{size:.1f}GB'
+
+METRICS = [
+    ('wall_time', lambda v: f'{v:.2f}s'),
+    ('export_time', lambda v: f'{v:.2f}s'),
+    ('peak_rss', format_bytes),
+    ('output_size', format_bytes),
+]
+
+def print_results(results):
+    for name, result in results['scenarios'].items():
+        cells = [f'{key} {fmt(result[key]) if result[key] is not None else "-"}' for key, fmt in METRICS]
+        print(f'{name:12} ' + '  '.join(cells))
+
+def compare(old_path, new_path, threshold):
+    """ Print the change of every metric between two result files. Returns False if any got worse by more than `threshold`.
+    """
+    with open(old_path) as file:
+        old = json.load(file)
+    with open(new_path) as file:
+        new = json.load(file)
+    print(f"{old['commit']} -> {new['commit']}")
+    if old.get('blender') != new.get('blender') or old.get('machine') != new.get('machine'):
+        print('WARNING: The results were measured with a different Blender or on a different machine')
+    if old.get('mode') != new.get('mode') or old.get('format') != new.get('format'):
+        print(f"Can't compare {old.get('mode')} {old.get('format')} exports with {new.get('mode')} {new.get('format')} exports, skipping")
+        return True
+    ok = True
+    for name, result in new['scenarios'].items():
+        old_result = old['scenarios'].get(name)
+        if not old_result:
+            continue
+        if old_result.get('settings') != result.get('settings'):
+            print(f'{name}: scenario settings changed, skipping')
+            continue
+        cells = []
+        for key, fmt in METRICS:
+            before = old_result.get(key)
+            after = result.get(key)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            flag = ''
+            if change > threshold:
+                flag = ' !'
+                ok = False
+            cells.append(f'{key} {fmt(before)} -> {fmt(after)} ({change:+.1%}){flag}')
+        print(f'{name:12} ' + '  '.join(cells))
+    return ok
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--blender', default=os.environ.get('BLENDER', 'blender'), help='Blender executable (default: $BLENDER or `blender`)')
+    parser.add_argument('--scenarios', nargs='*', help='Scenarios from scenarios.json to run (default: all)')
+    parser.add_argument('--mode', choices=['operator', 'script'], default='operator',
+                        help='Export through GLTFIO_OT_export or through export_all.py')
+    parser.add_argument('--format', choices=['GLTF_SEPARATE', 'GLB'], default=None)
+    parser.add_argument('--repeat', type=int, default=1, help='Exports per scenario, the median is recorded')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Result file (default: results/<commit>.json)')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='Compare two result files instead of running')
+    parser.add_argument('--threshold', type=float, default=.1, help='Relative slowdown reported as a regression by --compare')
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(0 if compare(*args.compare, args.threshold) else 1)
+
+    with open(BENCHMARK_DIR / 'scenarios.json') as file:
+        scenarios = json.load(file)
+    names = args.scenarios or list(scenarios)
+    unknown = [name for name in names if name not in scenarios]
+    if unknown:
+        parser.error(f'Unknown scenarios: {", ".join(unknown)}')
+
+    results = {
+        'commit': git_commit(),
+        'blender': blender_version(args.blender),
+        'machine': f'{platform.system()} {platform.machine()} {platform.processor()} {os.cpu_count()} CPUs',
+        'mode': args.mode,
+        'format': args.format,
+        'repeat': args.repeat,
+        'scenarios': dict(),
+    }
+    for name in names:
+        print(f'Running {name}...')
+        results['scenarios'][name] = run_scenario(args.blender, name, scenarios[name], args)
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{results['commit']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as file:
+        json.dump(results, file, indent=4)
+    print_results(results)
+    print(f'Wrote {output}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# gltfio_core doesn't depend on bpy, import it from the add-on directory
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'OriginalSource' / 'OriginalSourceBlenderAddon'))
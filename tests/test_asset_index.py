@@ -0,0 +1,113 @@
+import json
+import os
+
+import pytest
+
+from gltfio_core import asset_index, gltf_scan, project
+
+def make_config(tmp_path):
+    (tmp_path / 'game').mkdir()
+    return project.ProjectConfig(tmp_path)
+
+def read_index(config, index_type='asset_index'):
+    with open(config.index_path(index_type)) as file:
+        return json.load(file)
+
+def test_flush_merges_with_index_on_disk(tmp_path):
+    config = make_config(tmp_path)
+    first = asset_index.AssetIndexManager(config)
+    second = asset_index.AssetIndexManager(config)
+    assert first.assets() == {}
+    assert second.assets() == {}
+
+    first.update({'a': {'name': 'chair'}})
+    second.update({'b': {'name': 'table'}})
+    first.flush()
+    second.flush()
+    assert read_index(config) == {'assets': {'a': {'name': 'chair'}, 'b': {'name': 'table'}}}
+
+    # Changes on disk are picked up on the next read
+    assert first.assets() == {'a': {'name': 'chair'}, 'b': {'name': 'table'}}
+
+def test_flush_writes_only_changed_indexes(tmp_path):
+    config = make_config(tmp_path)
+    manager = asset_index.AssetIndexManager(config)
+    manager.assets('material_index')
+    manager.flush()
+    assert not config.index_path('material_index').exists()
+
+def test_overwrite_replaces_index(tmp_path):
+    config = make_config(tmp_path)
+    manager = asset_index.AssetIndexManager(config)
+    manager.update({'a': {}, 'b': {}})
+    manager.flush()
+
+    manager.update({'b': {}}, overwrite=True)
+    manager.flush()
+    assert read_index(config) == {'assets': {'b': {}}}
+
+def test_index_keys(tmp_path):
+    config = make_config(tmp_path)
+    manager = asset_index.AssetIndexManager(config)
+    manager.update({'scene.blend': {'outputs': []}}, index_type='export_manifest')
+    manager.flush()
+    assert read_index(config, 'export_manifest') == {'files': {'scene.blend': {'outputs': []}}}
+
+def test_updates_stay_pending_without_lock(tmp_path):
+    config = make_config(tmp_path)
+    manager = asset_index.AssetIndexManager(config, lock_timeout=.1)
+    manager.update({'a': {}})
+    with asset_index.file_lock(config.index_path()):
+        manager.flush()
+        assert manager.pending() == ['asset_index']
+        with pytest.raises(asset_index.IndexWriteError):
+            manager.flush(strict=True)
+    assert not config.index_path().exists()
+
+    manager.flush(strict=True)
+    assert manager.pending() == []
+    assert read_index(config) == {'assets': {'a': {}}}
+
+def test_flush_merges_writes_within_the_same_mtime(tmp_path):
+    config = make_config(tmp_path)
+    manager = asset_index.AssetIndexManager(config)
+    other = asset_index.AssetIndexManager(config)
+    other.update({'a': {}})
+    other.flush()
+    mtime = config.index_path().stat().st_mtime_ns
+    assert manager.assets() == {'a': {}}
+
+    # Written by another export within the same timestamp tick
+    other.update({'b': {}})
+    other.flush()
+    os.utime(config.index_path(), ns=(mtime, mtime))
+
+    manager.update({'c': {}})
+    manager.flush()
+    assert read_index(config) == {'assets': {'a': {}, 'b': {}, 'c': {}}}
+
+def test_no_project():
+    manager = asset_index.AssetIndexManager(None)
+    assert manager.assets() is None
+    manager.update({'a': {}})
+    manager.flush()
+
+def test_cleanup_index(tmp_path):
+    config = make_config(tmp_path)
+    manager = asset_index.AssetIndexManager(config)
+    manager.update({'a': {'name': 'chair'}, 'old': {'name': 'gone'}})
+    manager.flush()
+    summaries = {os.path.join(str(tmp_path), 'chair.gltf'): {
+        'scene_extras': {'asset_type': 'ASSET', 'asset_id': 'a'},
+        'materials': [],
+    }}
+    project_scan = gltf_scan.ProjectScan(summaries)
+
+    assert asset_index.cleanup_index(manager, project_scan, dry_run=True) == ['old']
+    manager.flush()
+    assert set(read_index(config)['assets']) == {'a', 'old'}
+
+    assert asset_index.cleanup_index(manager, project_scan) == ['old']
+    manager.flush()
+    assert read_index(config) == {'assets': {'a': {'name': 'chair'}}}
+    assert asset_index.cleanup_index(asset_index.AssetIndexManager(config), project_scan, 'material_index') is None
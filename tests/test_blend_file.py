@@ -0,0 +1,97 @@
+import gzip
+import struct
+
+import pytest
+
+from gltfio_core import blend_file
+
+def _pad4(data):
+    return data + b'\x00' * (-len(data) % 4)
+
+def make_sdna(library_fields):
+    """ SDNA block with `char`, `ID` and a `Library` struct made of (type, name) fields.
+    """
+    types = ['char', 'ID', 'Library']
+    lengths = [1, 16]
+    names = []
+    fields = []
+    size = 0
+    for type_name, name in library_fields:
+        names.append(name)
+        fields += [types.index(type_name), len(names) - 1]
+        count = int(name.split('[')[1].rstrip(']')) if '[' in name else 1
+        size += lengths[types.index(type_name)] * count
+    lengths.append(size)
+
+    data = b'SDNANAME' + struct.pack('<i', len(names))
+    data = _pad4(data + b''.join(n.encode() + b'\x00' for n in names))
+    data = _pad4(data + b'TYPE' + struct.pack('<i', len(types)) + b''.join(t.encode() + b'\x00' for t in types))
+    data = _pad4(data + b'TLEN' + struct.pack(f'<{len(lengths)}h', *lengths))
+    data += b'STRC' + struct.pack('<i', 1)
+    data += struct.pack('<hh', types.index('Library'), len(library_fields)) + struct.pack(f'<{len(fields)}h', *fields)
+    return data, size
+
+def block(code, data):
+    # Legacy 64-bit little endian block header: code, len, old pointer, SDNA index, count
+    return struct.pack('<4siQii', code, len(data), 0, 0, 1) + data
+
+def make_blend(library_paths, legacy_name=False):
+    if legacy_name:
+        fields = [('ID', 'id'), ('char', 'name[1024]'), ('char', 'filepath[1024]')]
+    else:
+        fields = [('ID', 'id'), ('char', 'filepath[1024]')]
+    sdna, size = make_sdna(fields)
+    data = b'BLENDER-v404'
+    data += block(b'OB\x00\x00', b'\x00' * 32)
+    for path in library_paths:
+        stored = path.encode().ljust(1024, b'\x00')
+        if legacy_name:
+            # `name` holds the stored path, `filepath` the absolute one
+            library = b'\x00' * 16 + stored + b'/absolute'.ljust(1024, b'\x00')
+        else:
+            library = b'\x00' * 16 + stored
+        assert len(library) == size
+        data += block(b'LI\x00\x00', library)
+    data += block(b'DNA1', sdna)
+    data += block(b'ENDB', b'')
+    return data
+
+def test_read_library_paths(tmp_path):
+    path = tmp_path / 'scene.blend'
+    path.write_bytes(make_blend(['//props/chair.blend', '//../lib/rocks.blend']))
+    assert blend_file.read_library_paths(path) == ['//props/chair.blend', '//../lib/rocks.blend']
+
+def test_read_library_paths_legacy_name_field(tmp_path):
+    path = tmp_path / 'scene.blend'
+    path.write_bytes(make_blend(['//props/chair.blend'], legacy_name=True))
+    assert blend_file.read_library_paths(path) == ['//props/chair.blend']
+
+def test_read_library_paths_gzip(tmp_path):
+    path = tmp_path / 'scene.blend'
+    path.write_bytes(gzip.compress(make_blend(['//props/chair.blend'])))
+    assert blend_file.read_library_paths(path) == ['//props/chair.blend']
+
+def test_no_libraries(tmp_path):
+    path = tmp_path / 'scene.blend'
+    path.write_bytes(make_blend([]))
+    assert blend_file.read_library_paths(path) == []
+
+def test_not_a_blend_file(tmp_path):
+    path = tmp_path / 'scene.blend'
+    path.write_bytes(b'not a blend file')
+    with pytest.raises(blend_file.BlendFileError):
+        blend_file.read_library_paths(path)
+
+def test_dependency_graph(tmp_path):
+    (tmp_path / 'props').mkdir()
+    chair = tmp_path / 'props' / 'chair.blend'
+    wood = tmp_path / 'wood.blend'
+    scene = tmp_path / 'scene.blend'
+    wood.write_bytes(make_blend([]))
+    chair.write_bytes(make_blend(['//../wood.blend']))
+    scene.write_bytes(make_blend(['//props/chair.blend']))
+
+    assert blend_file.library_dependencies(scene) == [str(chair.resolve())]
+    graph = blend_file.build_dependency_graph([scene, chair, wood])
+    reverse = blend_file.reverse_dependency_graph(graph)
+    assert blend_file.transitive_dependents([wood], reverse) == {str(chair.resolve()), str(scene.resolve())}
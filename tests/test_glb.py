@@ -0,0 +1,107 @@
+import json
+import struct
+
+import pytest
+
+from gltfio_core import glb, gltf_scan, post_process, project
+
+BIN = bytes(range(256)) * 4
+
+def make_glb(data, bin_data=BIN, json_padding=0):
+    encoded = json.dumps(data).encode()
+    encoded += b' ' * ((-len(encoded) % 4) + json_padding)
+    chunks = struct.pack('<II', len(encoded), glb.CHUNK_JSON) + encoded
+    chunks += struct.pack('<II', len(bin_data), glb.CHUNK_BIN) + bin_data
+    return struct.pack('<4sII', glb.GLB_MAGIC, glb.GLB_VERSION, 12 + len(chunks)) + chunks
+
+def read_chunks(path):
+    """ (json bytes, bin chunk) of a .glb, checking the lengths and the alignment.
+    """
+    buf = path.read_bytes()
+    magic, version, length = struct.unpack_from('<4sII', buf)
+    assert (magic, version, length) == (glb.GLB_MAGIC, glb.GLB_VERSION, len(buf))
+    json_length, json_type = struct.unpack_from('<II', buf, 12)
+    assert json_type == glb.CHUNK_JSON and json_length % 4 == 0
+    json_data = buf[20:20 + json_length]
+    rest = buf[20 + json_length:]
+    bin_length, bin_type = struct.unpack_from('<II', rest)
+    assert bin_type == glb.CHUNK_BIN and len(rest) == 8 + bin_length
+    return json_data, rest[8:]
+
+def gltf_data(uri='textures/wood.png'):
+    return {
+        'asset': {'version': '2.0'},
+        'scenes': [{'extras': {'asset_type': 'ASSET', 'asset_id': 'a1'}}],
+        'images': [{'name': 'wood', 'uri': uri, 'extras': {'source_path': 'textures/wood.png'}}],
+    }
+
+def test_load_json_glb(tmp_path):
+    path = tmp_path / 'chair.glb'
+    path.write_bytes(make_glb(gltf_data()))
+    assert glb.load_json(path) == gltf_data()
+
+def test_save_json_in_place(tmp_path):
+    """ JSON that fits the existing chunk is written in place, padded with spaces.
+    """
+    path = tmp_path / 'chair.glb'
+    path.write_bytes(make_glb(gltf_data(), json_padding=16))
+    size = path.stat().st_size
+
+    glb.save_json(path, gltf_data('wood.png'))
+    json_data, bin_data = read_chunks(path)
+    assert path.stat().st_size == size
+    assert json_data.rstrip(b' ') == json.dumps(gltf_data('wood.png'), separators=(',', ':')).encode()
+    assert bin_data == BIN
+    assert glb.load_json(path) == gltf_data('wood.png')
+
+def test_save_json_grows(tmp_path):
+    """ Larger JSON rewrites the file, keeping the BIN chunk and the 4-byte alignment.
+    """
+    path = tmp_path / 'chair.glb'
+    path.write_bytes(make_glb(gltf_data()))
+
+    for length in range(1, 5):
+        data = gltf_data('../' * 10 + 'x' * length + '.png')
+        glb.save_json(path, data)
+        json_data, bin_data = read_chunks(path)
+        assert bin_data == BIN
+        assert glb.load_json(path) == data
+
+def test_save_json_gltf(tmp_path):
+    path = tmp_path / 'chair.gltf'
+    path.write_text(json.dumps(gltf_data()))
+    glb.save_json(path, gltf_data('wood.png'))
+    assert glb.load_json(path) == gltf_data('wood.png')
+
+def test_truncated_glb(tmp_path):
+    path = tmp_path / 'chair.glb'
+    path.write_bytes(make_glb(gltf_data())[:30])
+    with pytest.raises(glb.GlbError):
+        glb.load_json(path)
+
+def test_scan_glb_extras(tmp_path):
+    path = tmp_path / 'chair.glb'
+    data = gltf_data()
+    data['materials'] = [{'name': 'MA-wood', 'extras': {'asset_id': 'm1'}}]
+    path.write_bytes(make_glb(data))
+    summary = gltf_scan.summarize_gltf(path)
+    assert summary['scene_extras'] == {'asset_type': 'ASSET', 'asset_id': 'a1'}
+    assert summary['materials'] == [{'name': 'MA-wood', 'extras': {'asset_id': 'm1'}}]
+
+def test_relocate_embedded_image_textures(tmp_path, capsys):
+    (tmp_path / 'game').mkdir()
+    config = project.ProjectConfig(tmp_path)
+    data = gltf_data()
+    data['images'][0].pop('uri')
+    data['images'][0]['bufferView'] = 0
+    path = tmp_path / 'game' / 'chair.glb'
+    path.write_bytes(make_glb(data))
+    before = path.read_bytes()
+
+    def resize(filepath):
+        raise AssertionError('embedded images are not resized')
+
+    outputs, image_count = post_process.relocate_image_textures(config, path, resize=resize, settings_key='512px')
+    assert (outputs, image_count) == ([path], 1)
+    assert path.read_bytes() == before
+    assert 'Not resizing 1 image textures embedded in chair.glb' in capsys.readouterr().out
@@ -0,0 +1,61 @@
+import json
+import base64
+
+from gltfio_core import gltf_scan
+
+def make_gltf(asset_id='a1', material_ids=('m1',), instance_ids=()):
+    return {
+        'asset': {'version': '2.0'},
+        'scenes': [{'name': 'Scene', 'extras': {'asset_type': 'ASSET', 'asset_id': asset_id}}],
+        'nodes': [{'name': f'instance_{i}', 'extras': {'instance_asset_id': i}} for i in instance_ids] + [{'name': 'plain'}],
+        'materials': [{'name': f'MA-{i}', 'extras': {'asset_id': i}} for i in material_ids] + [{'name': 'no_extras'}],
+        # Skipped without being decoded
+        'buffers': [{'byteLength': 3, 'uri': 'data:application/octet-stream;base64,' + base64.b64encode(b'abc').decode()}],
+    }
+
+def write_gltf(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data, indent=4))
+    return path
+
+def test_read_json_keys_skips_other_values():
+    buf = b'{"a": {"x": [1, "}", {"y": "\\"]"}]}, "b": [1, 2], "c": "skip"}'
+    assert gltf_scan.read_json_keys(buf, ('b',)) == {'b': [1, 2]}
+
+def test_summarize_gltf_extras(tmp_path):
+    path = write_gltf(tmp_path / 'chair.gltf', make_gltf('a1', ['m1', 'm2'], ['i2', 'i1']))
+    summary = gltf_scan.summarize_gltf(path)
+    assert summary['scene_extras'] == {'asset_type': 'ASSET', 'asset_id': 'a1'}
+    assert summary['materials'] == [
+        {'name': 'MA-m1', 'extras': {'asset_id': 'm1'}},
+        {'name': 'MA-m2', 'extras': {'asset_id': 'm2'}},
+        {'name': 'no_extras', 'extras': None},
+    ]
+    assert summary['instance_asset_ids'] == ['i1', 'i2']
+
+def test_scan_gltf_files_cache(tmp_path):
+    path = write_gltf(tmp_path / 'chair.gltf', make_gltf('a1'))
+    broken = tmp_path / 'broken.gltf'
+    broken.write_text('')
+    cache = gltf_scan.GltfScanCache(str(tmp_path / 'cache.json'))
+
+    summaries = gltf_scan.scan_gltf_files([path, broken], cache=cache)
+    assert summaries[str(broken)] is None
+    assert summaries[str(path)]['scene_extras']['asset_id'] == 'a1'
+    cache.save()
+
+    # Unchanged files come from the cache saved on disk
+    cache = gltf_scan.GltfScanCache(str(tmp_path / 'cache.json'))
+    assert cache.get(str(path), path.stat()) == summaries[str(path)]
+
+def test_project_scan(tmp_path):
+    chair = str(write_gltf(tmp_path / 'chair.gltf', make_gltf('a1', ['m1'])))
+    room = str(write_gltf(tmp_path / 'room.gltf', make_gltf('a2', ['m1'], ['a1'])))
+    project_scan = gltf_scan.ProjectScan(gltf_scan.scan_gltf_files([chair, room]))
+
+    assert project_scan.assets == {'a1': chair, 'a2': room}
+    assert project_scan.references['a1'] == sorted([chair, room])
+    assert set(project_scan.materials) == {'m1'}
+    index = {'a1': {}, 'old': {}}
+    assert project_scan.missing(index) == {'a2': room}
+    assert project_scan.orphans(index) == {'old'}
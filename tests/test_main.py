@@ -0,0 +1,14 @@
+import json
+
+from gltfio_core import __main__ as cli
+
+def test_project_options_before_and_after_command(tmp_path):
+    (tmp_path / 'assets').mkdir()
+    with open(tmp_path / 'assets' / 'asset_index.json', 'w') as file:
+        json.dump({'assets': {'a': {'name': 'chair', 'filepath': 'chair.gltf'}}}, file)
+
+    # The unused entry is only found in the `assets` target directory
+    assert cli.main(['validate', '--project', str(tmp_path), '--target', 'assets']) == 1
+    assert cli.main(['--project', str(tmp_path), '--target', 'assets', 'validate']) == 1
+    assert cli.main(['--project', str(tmp_path), '--target', 'assets', 'validate', '--source', '']) == 1
+    assert cli.main(['--project', str(tmp_path), 'validate']) == 0
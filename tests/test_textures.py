@@ -0,0 +1,97 @@
+import os
+
+from gltfio_core import textures
+
+def write(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return path
+
+def test_relocate_files(tmp_path):
+    export_dir = tmp_path / 'export' / 'textures'
+    wood = write(export_dir / 'wood.png', b'wood')
+    rock = write(export_dir / 'rock.png', b'rock')
+    missing = export_dir / 'missing.png'
+    target_dir = tmp_path / 'game' / 'textures'
+
+    results = textures.relocate_files([
+        (wood, target_dir / 'wood.png'),
+        (rock, target_dir / 'rocks' / 'rock.png'),
+        (missing, target_dir / 'missing.png'),
+    ])
+    assert results == [textures.MOVED, textures.MOVED, textures.FAILED]
+    assert (target_dir / 'wood.png').read_bytes() == b'wood'
+    assert (target_dir / 'rocks' / 'rock.png').read_bytes() == b'rock'
+    # The emptied export directory is removed
+    assert not export_dir.exists()
+
+def test_relocate_files_identical_target(tmp_path):
+    target = write(tmp_path / 'game' / 'wood.png', b'wood')
+    os.utime(target, ns=(1, 1))
+    source = write(tmp_path / 'export' / 'wood.png', b'wood')
+
+    assert textures.relocate_files([(source, target)]) == [textures.UNCHANGED]
+    assert not source.exists()
+    # Left untouched, so Godot doesn't reimport it
+    assert target.stat().st_mtime_ns == 1
+
+def test_relocate_files_changed_target(tmp_path):
+    target = write(tmp_path / 'game' / 'wood.png', b'old wood')
+    source = write(tmp_path / 'export' / 'wood.png', b'new wood')
+
+    assert textures.relocate_files([(source, target)]) == [textures.MOVED]
+    assert target.read_bytes() == b'new wood'
+
+def test_relocate_files_texture_store(tmp_path):
+    store = textures.TextureStore(tmp_path / 'game' / '.texture_store')
+    target_dir = tmp_path / 'game' / 'textures'
+    wood = write(tmp_path / 'export_a' / 'wood.png', b'wood')
+    copy = write(tmp_path / 'export_b' / 'wood.png', b'wood')
+
+    results = textures.relocate_files([(wood, target_dir / 'wood.png'), (copy, target_dir / 'wood_copy.png')], store=store)
+    assert sorted(results) == [textures.MOVED, textures.MOVED]
+    # Both targets link the single stored object
+    stored = store.object_path(textures.file_digest(target_dir / 'wood.png'), '.png')
+    assert os.path.samefile(stored, target_dir / 'wood.png')
+    assert os.path.samefile(stored, target_dir / 'wood_copy.png')
+    assert os.stat(stored).st_nlink == 3
+
+    # Exporting the same content again leaves the target as is
+    again = write(tmp_path / 'export_a' / 'wood.png', b'wood')
+    assert textures.relocate_files([(again, target_dir / 'wood.png')], store=store) == [textures.UNCHANGED]
+    assert not again.exists()
+
+def test_texture_store_parallel_identical_content(tmp_path):
+    store = textures.TextureStore(tmp_path / 'game' / '.texture_store')
+    moves = [(write(tmp_path / f'export_{i}' / 'wood.png', b'wood'), tmp_path / 'game' / f'wood_{i}.png') for i in range(16)]
+
+    assert textures.relocate_files(moves, store=store, max_workers=8) == [textures.MOVED] * 16
+    # Objects added at the same time aren't replaced, every target links the same one
+    stored = store.object_path(textures.file_digest(moves[0][1]), '.png')
+    assert all(os.path.samefile(stored, target) for source, target in moves)
+    assert os.stat(stored).st_nlink == 17
+
+def test_texture_store_adopts_existing_target(tmp_path):
+    store = textures.TextureStore(tmp_path / 'game' / '.texture_store')
+    target = write(tmp_path / 'game' / 'wood.png', b'wood')
+    os.utime(target, ns=(1, 1))
+    source = write(tmp_path / 'export' / 'wood.png', b'wood')
+
+    assert textures.relocate_files([(source, target)], store=store) == [textures.UNCHANGED]
+    assert target.stat().st_mtime_ns == 1
+    assert os.path.samefile(store.object_path(textures.file_digest(target), '.png'), target)
+
+def test_texture_store_collect_garbage(tmp_path):
+    store = textures.TextureStore(tmp_path / 'game' / '.texture_store')
+    wood = tmp_path / 'game' / 'wood.png'
+    rock = tmp_path / 'game' / 'rock.png'
+    textures.relocate_files([
+        (write(tmp_path / 'export' / 'wood.png', b'wood'), wood),
+        (write(tmp_path / 'export' / 'rock.png', b'rock'), rock),
+    ], store=store)
+
+    assert store.collect_garbage() == 0
+    rock.unlink()
+    assert store.collect_garbage() == 1
+    assert wood.read_bytes() == b'wood'
+    assert store.collect_garbage() == 0